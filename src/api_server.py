@@ -1,42 +1,226 @@
+if __name__ == "__main__":
+    # При прямом запуске патчим сокеты до импорта остальных модулей
+    # (uvicorn работает на asyncio, ему патч не нужен)
+    from config import API_SERVER
+    if API_SERVER == "gevent":
+        from gevent import monkey
+        monkey.patch_all()
+
+import hashlib
 import logging
 import os
-from datetime import datetime
-from flask import Flask, request, jsonify
-from flask_cors import CORS
-from config import FLASK_HOST, FLASK_PORT, API_BASE_URL
-from database import init_db, User, Card, Collection, Airdrop, AirdropCard
+import time
+import orjson
+from flask import Flask, request, g
+from flask_compress import Compress
+from werkzeug.exceptions import HTTPException
+from config import FLASK_HOST, FLASK_PORT, API_BASE_URL, API_SERVER, NPLUSONE, NPLUSONE_THRESHOLD
+from database import init_db, start_optimize_timer, start_cleanup_timer, pin_conn, unpin_conn, start_query_log, stop_query_log, User, Collection, Airdrop
+from cache import cached, memoize
 
 # Initialize Flask app
 app = Flask(__name__)
 
-# Configure CORS for websites
-CORS(app, resources={
-    r"/api/*": {
-        "origins": ["*"],  # Allow all origins for websites
-        "methods": ["GET", "POST", "OPTIONS"],
-        "allow_headers": ["Content-Type", "Authorization"]
-    }
-})
+def ojson(obj, status=200):
+    """Сериализует ответ через orjson вместо стандартного jsonify"""
+    return app.response_class(
+        orjson.dumps(obj, option=orjson.OPT_NAIVE_UTC),
+        status=status,
+        mimetype='application/json'
+    )
+
+def get_request_conn():
+    """Соединение из пула, закреплённое за текущим запросом (его же используют модели)"""
+    if 'db' not in g:
+        g.db = pin_conn()
+    return g.db
+
+@app.teardown_appcontext
+def _release_request_conn(exc):
+    """Возвращает соединение запроса в пул вместо закрытия"""
+    if g.pop('db', None) is not None:
+        unpin_conn()
+
+# SQLite хранит INTEGER в 64 битах: большие значения sqlite3 не привязывает (OverflowError)
+_SQLITE_INT_MIN = -2**63
+_SQLITE_INT_MAX = 2**63 - 1
+
+def _fits_sqlite_int(value):
+    """Помещается ли число в INTEGER SQLite"""
+    return _SQLITE_INT_MIN <= value <= _SQLITE_INT_MAX
+
+class RequestValidationError(Exception):
+    """Некорректные параметры запроса; текст уходит клиенту как ответ 400"""
+
+def _parse_int(value):
+    """Приводит идентификатор из JSON к int без исключений; None, если значение некорректно"""
+    if isinstance(value, str):
+        digits = value[1:] if value.startswith('-') else value
+        if not digits.isdecimal():
+            return None
+        value = int(value)
+    elif not isinstance(value, int) or isinstance(value, bool):
+        return None
+    return value if _fits_sqlite_int(value) else None
+
+def _parse_str(value):
+    """Строковое поле JSON; None, если пришёл другой тип"""
+    return value if isinstance(value, str) else None
+
+_FIELD_PARSERS = {int: _parse_int, str: _parse_str}
+_FIELD_TYPE_NAMES = {int: "an integer", str: "a string"}
+
+# Схемы тел POST-запросов: {поле: тип}
+_TG_SCHEMA = {"telegram_id": int}
+_COLLECTION_CHECK_SCHEMA = {"telegram_id": int, "collection_access_key": str}
+_AIRDROP_CHECK_SCHEMA = {"telegram_id": int, "airdrop_id": int}
+
+def _require(data, schema):
+    """
+    Проверяет тело запроса по схеме
+    
+    Возвращает значения полей в порядке схемы; при ошибке бросает RequestValidationError
+    """
+    if not isinstance(data, dict) or any(name not in data for name in schema):
+        verb = "is" if len(schema) == 1 else "are"
+        raise RequestValidationError(f"{' and '.join(schema)} {verb} required")
+    
+    values = []
+    for name, kind in schema.items():
+        value = _FIELD_PARSERS[kind](data[name])
+        if value is None:
+            raise RequestValidationError(f"{name} must be {_FIELD_TYPE_NAMES[kind]}")
+        values.append(value)
+    return values
+
+def _require_path_int(name, value):
+    """Проверяет, что целое из пути URL помещается в INTEGER SQLite"""
+    if not _fits_sqlite_int(value):
+        raise RequestValidationError(f"{name} must be an integer")
+
+# Keyset-пагинация списков: ?limit=<n>&after=<next_cursor>
+DEFAULT_PAGE_LIMIT = 50
+MAX_PAGE_LIMIT = 200
+_MAX_ROWID = 2 ** 63 - 1
+
+def _parse_page():
+    """Читает limit/after из query string; при ошибке бросает RequestValidationError"""
+    limit = _parse_int(request.args.get('limit', DEFAULT_PAGE_LIMIT))
+    after = _parse_int(request.args.get('after', 0))
+    if limit is None or after is None or limit < 1 or after < 0:
+        raise RequestValidationError("limit must be a positive integer and after a non-negative integer")
+    return min(limit, MAX_PAGE_LIMIT), after
+
+def _next_cursor(items, limit):
+    """Курсор следующей страницы или None, если страница последняя"""
+    return items[-1]["id"] if len(items) == limit else None
+
+# Configure CORS for websites: the policy is static, so the headers are constant
+_CORS_HEADERS = [
+    ('Access-Control-Allow-Origin', '*'),  # Allow all origins for websites
+    ('Access-Control-Allow-Methods', 'GET, POST, OPTIONS'),
+    ('Access-Control-Allow-Headers', 'Content-Type, Authorization'),
+]
+
+@app.after_request
+def _add_cors_headers(response):
+    if request.path.startswith('/api/'):
+        response.headers.extend(_CORS_HEADERS)
+    return response
+
+# Preflight requests for every /api/* path are answered before view dispatch;
+# the CORS headers are added by _add_cors_headers
+app.config['PROVIDE_AUTOMATIC_OPTIONS'] = False
+
+@app.before_request
+def _cors_preflight():
+    if request.method == 'OPTIONS' and request.path.startswith('/api/'):
+        return app.response_class(status=204)
+
+# Compress JSON responses (card lists are highly repetitive)
+app.config['COMPRESS_MIMETYPES'] = ['application/json']
+app.config['COMPRESS_MIN_SIZE'] = 512
+app.config['COMPRESS_LEVEL'] = 4
+app.config['COMPRESS_BR_LEVEL'] = 4
+app.config['COMPRESS_ALGORITHM'] = ['br', 'gzip']
+Compress(app)
+
+# Dev-only N+1 detector: warn when a request repeats the same SQL statement
+if NPLUSONE:
+    nplusone_logger = logging.getLogger("nplusone")
+    
+    @app.before_request
+    def _start_query_log():
+        start_query_log()
+    
+    @app.after_request
+    def _report_repeated_queries(response):
+        for sql, count in stop_query_log().items():
+            if count >= NPLUSONE_THRESHOLD:
+                nplusone_logger.warning(f"Potential N+1 in {request.method} {request.path}: {count}x {sql}")
+        return response
+
+# Ошибки обрабатываются здесь, а не в try/except каждого эндпоинта
+logger = logging.getLogger(__name__)
+
+# 400 только для проверок входных данных: прочие ValueError/KeyError - ошибки кода и идут в 500
+@app.errorhandler(RequestValidationError)
+def _handle_bad_request(e):
+    return ojson({"error": str(e)}, 400)
+
+@app.errorhandler(Exception)
+def _handle_unexpected_error(e):
+    # 404/405 и прочие HTTP-ошибки оставляем Flask
+    if isinstance(e, HTTPException):
+        return e
+    logger.exception(f"Unhandled error in {request.method} {request.path}")
+    return ojson({"error": "Internal server error"}, 500)
+
+# Всё, кроме timestamp, статично: готовим хвост ответа заранее
+_HEALTH_TAIL = orjson.dumps({
+    "status": "healthy",
+    "version": "1.1.0",
+    "endpoints": [
+        "GET /api/health",
+        "POST /api/check-card",
+        "POST /api/check-collection",
+        "POST /api/check-airdrop",
+        "GET /api/collections",
+        "GET /api/collections/<id>",
+        "GET /api/cards/<access_key>",
+        "GET /api/user/<telegram_id>/cards",
+        "GET /api/docs"
+    ]
+})[1:]
 
 @app.route('/api/health', methods=['GET'])
 def health_check():
     """Проверка работы API"""
-    return jsonify({
-        "status": "healthy",
-        "timestamp": datetime.utcnow().isoformat(),
-        "version": "1.1.0",
-        "endpoints": [
-            "GET /api/health",
-            "POST /api/check-card",
-            "POST /api/check-collection",
-            "POST /api/check-airdrop",
-            "GET /api/collections",
-            "GET /api/collections/<id>",
-            "GET /api/cards/<access_key>",
-            "GET /api/user/<telegram_id>/cards",
-            "GET /api/docs"
-        ]
-    })
+    # timestamp - Unix time в секундах: float сериализуется без форматирования даты
+    timestamp = orjson.dumps(time.time())
+    return app.response_class(b'{"timestamp":' + timestamp + b',' + _HEALTH_TAIL, mimetype='application/json')
+
+def _user_cards(telegram_id: int, limit: int = -1, after: int = 0) -> list:
+    """Карты пользователя в виде готовых для ответа словарей (один JOIN-запрос)"""
+    cursor = get_request_conn().cursor()
+    cursor.execute("""
+        SELECT c.id, c.card_number, c.name, c.access_key, c.registration_date, c.collection_id
+        FROM cards c
+        JOIN users u ON c.owner_id = u.telegram_id
+        WHERE u.telegram_id = ? AND c.id > ?
+        ORDER BY c.id
+        LIMIT ?
+    """, (telegram_id, after, limit))
+    return [dict(row) for row in cursor.fetchall()]
+
+def _user_card_count(telegram_id: int) -> int:
+    """Общее число карт пользователя независимо от страницы (покрывается idx_cards_owner)"""
+    return get_request_conn().execute("""
+        SELECT COUNT(*)
+        FROM cards c
+        JOIN users u ON c.owner_id = u.telegram_id
+        WHERE u.telegram_id = ?
+    """, (telegram_id,)).fetchone()[0]
 
 @app.route('/api/check-card', methods=['POST'])
 def check_card():
@@ -62,47 +246,17 @@ def check_card():
         ]
     }
     """
-    try:
-        data = request.get_json()
-        if not data or 'telegram_id' not in data:
-            return jsonify({"error": "telegram_id is required"}), 400
-        
-        telegram_id = int(data['telegram_id'])
-        
-        # Получаем пользователя
-        user = User.get_by_telegram_id(telegram_id)
-        if not user:
-            return jsonify({
-                "has_card": False,
-                "card_count": 0,
-                "cards": [],
-                "message": "User not found"
-            })
-        
-        # Получаем все карты пользователя
-        cards = user.get_cards()
-        
-        # Формируем ответ
-        card_data = []
-        for card in cards:
-            card_data.append({
-                "id": card.id,
-                "card_number": card.card_number,
-                "name": card.name,
-                "access_key": card.access_key,
-                "registration_date": card.registration_date,
-                "collection_id": card.collection_id
-            })
-        
-        return jsonify({
-            "has_card": len(cards) > 0,
-            "card_count": len(cards),
-            "cards": card_data,
-            "message": f"Found {len(cards)} cards"
-        })
-        
-    except Exception as e:
-        return jsonify({"error": str(e)}), 500
+    telegram_id, = _require(request.get_json(silent=True), _TG_SCHEMA)
+    
+    # Пустой результат означает, что пользователь не найден или у него нет карт
+    card_data = _user_cards(telegram_id)
+    
+    return ojson({
+        "has_card": len(card_data) > 0,
+        "card_count": len(card_data),
+        "cards": card_data,
+        "message": f"Found {len(card_data)} cards"
+    })
 
 @app.route('/api/check-collection', methods=['POST'])
 def check_collection():
@@ -133,70 +287,83 @@ def check_collection():
         ]
     }
     """
-    try:
-        data = request.get_json()
-        if not data or 'telegram_id' not in data or 'collection_access_key' not in data:
-            return jsonify({"error": "telegram_id and collection_access_key are required"}), 400
-        
-        telegram_id = int(data['telegram_id'])
-        collection_access_key = data['collection_access_key']
-        
-        # Получаем пользователя
-        user = User.get_by_telegram_id(telegram_id)
-        if not user:
-            return jsonify({
-                "has_collection_card": False,
-                "collection": None,
-                "cards": [],
-                "message": "User not found"
-            })
-        
-        # Ищем коллекцию по access key
-        collection = Collection.get_by_access_key(collection_access_key)
-        if not collection:
-            return jsonify({
-                "has_collection_card": False,
-                "collection": None,
-                "cards": [],
-                "message": "Collection not found"
-            })
-        
-        # Получаем все карты коллекции
-        collection_cards = collection.get_cards()
-        
-        # Проверяем, есть ли у пользователя карты из этой коллекции
-        user_cards_in_collection = []
-        for card in collection_cards:
-            if card.owner_id == user.id:
-                user_cards_in_collection.append({
-                    "id": card.id,
-                    "card_number": card.card_number,
-                    "name": card.name,
-                    "access_key": card.access_key,
-                    "registration_date": card.registration_date
-                })
-        
-        # Формируем ответ
-        collection_data = {
-            "id": collection.id,
-            "name": collection.name,
-            "description": collection.description,
-            "author_id": collection.author_id,
-            "star_price": collection.star_price,
-            "link_id": collection.link_id
-        }
-        
-        return jsonify({
-            "has_collection_card": len(user_cards_in_collection) > 0,
-            "collection": collection_data,
-            "cards": user_cards_in_collection,
-            "message": f"Found {len(user_cards_in_collection)} cards from collection"
+    telegram_id, collection_access_key = _require(request.get_json(silent=True), _COLLECTION_CHECK_SCHEMA)
+    
+    # Получаем пользователя
+    user = User.get_by_telegram_id(telegram_id)
+    if not user:
+        return ojson({
+            "has_collection_card": False,
+            "collection": None,
+            "cards": [],
+            "message": "User not found"
         })
-        
-    except Exception as e:
-        return jsonify({"error": str(e)}), 500
+    
+    # Ищем коллекцию по access key
+    collection = Collection.get_by_access_key(collection_access_key)
+    if not collection:
+        return ojson({
+            "has_collection_card": False,
+            "collection": None,
+            "cards": [],
+            "message": "Collection not found"
+        })
+    
+    # Получаем только карты пользователя из этой коллекции
+    # (owner_id хранит telegram_id владельца, как и в User.get_cards)
+    cursor = get_request_conn().cursor()
+    cursor.execute("""
+        SELECT id, card_number, name, access_key, registration_date
+        FROM cards
+        WHERE collection_id = ? AND owner_id = ?
+    """, (collection.id, user.telegram_id))
+    user_cards_in_collection = [dict(row) for row in cursor.fetchall()]
+    
+    # Формируем ответ
+    collection_data = {
+        "id": collection.id,
+        "name": collection.name,
+        "description": collection.description,
+        "author_id": collection.author_id,
+        "star_price": collection.star_price,
+        "link_id": collection.link_id
+    }
+    
+    return ojson({
+        "has_collection_card": len(user_cards_in_collection) > 0,
+        "collection": collection_data,
+        "cards": user_cards_in_collection,
+        "message": f"Found {len(user_cards_in_collection)} cards from collection"
+    })
+
+# card_count поддерживается триггерами на cards (миграция 1.11.0)
+_Q_COLLECTIONS = """
+    SELECT id, name, COALESCE(description, ''), star_price, link_id, card_count
+    FROM collections
+    WHERE id < ?
+    ORDER BY id DESC
+    LIMIT ?
+"""
+_COLLECTION_COLS = ("id", "name", "description", "star_price", "link_id", "card_count")
+
+@memoize(ttl=30, namespace="collections")
+def _collections_page(limit: int, after: int):
+    """Сериализованная страница списка коллекций и её ETag"""
+    # Новые коллекции первыми: курсор задаёт верхнюю границу id
+    cursor = get_request_conn().execute(_Q_COLLECTIONS, (after or _MAX_ROWID, limit))
+    collections = [dict(zip(_COLLECTION_COLS, row)) for row in cursor]
+    # count - общее число коллекций, как до пагинации, а не размер страницы
+    total, = get_request_conn().execute("SELECT COUNT(*) FROM collections").fetchone()
+    
+    body = orjson.dumps({
+        "collections": collections,
+        "count": total,
+        "next_cursor": _next_cursor(collections, limit)
+    })
+    return body, hashlib.blake2b(body, digest_size=8).hexdigest()
 
 @app.route('/api/collections', methods=['GET'])
+@cached(ttl=30, namespace="collections")
 def get_collections():
     """
     Получить список всех публичных коллекций
@@ -215,42 +382,50 @@ def get_collections():
         ]
     }
     """
-    try:
-        from database import get_db_connection
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute("""
-            SELECT c.id, c.name, c.description, c.star_price, c.link_id,
-                   COUNT(cards.id) as card_count
-            FROM collections c
-            LEFT JOIN cards ON c.id = cards.collection_id
-            GROUP BY c.id, c.name, c.description, c.star_price, c.link_id
-            ORDER BY c.created_at DESC
-        """)
-        
-        collections = []
-        for row in cursor.fetchall():
-            collections.append({
-                "id": row[0],
-                "name": row[1],
-                "description": row[2] or "",
-                "star_price": row[3],
-                "link_id": row[4],
-                "card_count": row[5]
-            })
-        
-        conn.close()
-        
-        return jsonify({
-            "collections": collections,
-            "count": len(collections)
-        })
-        
-    except Exception as e:
-        return jsonify({"error": str(e)}), 500
+    limit, after = _parse_page()
+    
+    body, etag = _collections_page(limit, after)
+    
+    response = app.response_class(body, mimetype='application/json')
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'public, max-age=30'
+    # Отвечает 304, если If-None-Match совпадает с ETag
+    return response.make_conditional(request)
+
+@memoize(ttl=30, namespace="collections")
+def _collection_payload(collection_id: int, limit: int, after: int):
+    """Страница коллекции с картами для ответа (None, если коллекции нет)"""
+    collection = Collection.get_by_id(collection_id)
+    if not collection:
+        return None
+    
+    cursor = get_request_conn().cursor()
+    cursor.execute("""
+        SELECT id, card_number, name, access_key, registration_date
+        FROM cards
+        WHERE collection_id = ? AND id > ?
+        ORDER BY id
+        LIMIT ?
+    """, (collection.id, after, limit))
+    card_data = [dict(row) for row in cursor.fetchall()]
+    
+    collection_data = {
+        "id": collection.id,
+        "name": collection.name,
+        "description": collection.description or "",
+        "star_price": collection.star_price,
+        "link_id": collection.link_id,
+        "author_id": collection.author_id,
+        "cards": card_data
+    }
+    
+    return {
+        "collection": collection_data,
+        "next_cursor": _next_cursor(card_data, limit)
+    }
 
 @app.route('/api/collections/<int:collection_id>', methods=['GET'])
+@cached(ttl=30, namespace="collections")
 def get_collection(collection_id):
     """
     Получить детальную информацию о коллекции
@@ -276,41 +451,31 @@ def get_collection(collection_id):
         }
     }
     """
-    try:
-        collection = Collection.get_by_id(collection_id)
-        if not collection:
-            return jsonify({"error": "Collection not found"}), 404
-        
-        cards = collection.get_cards()
-        card_data = []
-        
-        for card in cards:
-            card_data.append({
-                "id": card.id,
-                "card_number": card.card_number,
-                "name": card.name,
-                "access_key": card.access_key,
-                "registration_date": card.registration_date
-            })
-        
-        collection_data = {
-            "id": collection.id,
-            "name": collection.name,
-            "description": collection.description or "",
-            "star_price": collection.star_price,
-            "link_id": collection.link_id,
-            "author_id": collection.author_id,
-            "cards": card_data
-        }
-        
-        return jsonify({
-            "collection": collection_data
-        })
-        
-    except Exception as e:
-        return jsonify({"error": str(e)}), 500
+    _require_path_int("collection_id", collection_id)
+    limit, after = _parse_page()
+    
+    payload = _collection_payload(collection_id, limit, after)
+    if payload is None:
+        return ojson({"error": "Collection not found"}, 404)
+    
+    return ojson(payload)
+
+_Q_CARD_BY_KEY = """
+    SELECT id, card_number, name, access_key, registration_date,
+           collection_id, owner_id
+    FROM cards
+    WHERE access_key = ?
+"""
+
+@memoize(ttl=30, namespace="cards")
+def _card_payload(access_key: str):
+    """Данные карты по access key (None, если карты нет)"""
+    conn = get_request_conn()
+    row = conn.execute(_Q_CARD_BY_KEY, (access_key,)).fetchone()
+    return dict(row) if row else None
 
 @app.route('/api/cards/<access_key>', methods=['GET'])
+@cached(ttl=30, namespace="cards")
 def get_card_by_access_key(access_key):
     """
     Получить карту по access key
@@ -328,40 +493,13 @@ def get_card_by_access_key(access_key):
         }
     }
     """
-    try:
-        from database import get_db_connection
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute("""
-            SELECT id, card_number, name, access_key, registration_date, 
-                   collection_id, owner_id
-            FROM cards 
-            WHERE access_key = ?
-        """, (access_key,))
-        
-        row = cursor.fetchone()
-        conn.close()
-        
-        if not row:
-            return jsonify({"error": "Card not found"}), 404
-        
-        card_data = {
-            "id": row[0],
-            "card_number": row[1],
-            "name": row[2],
-            "access_key": row[3],
-            "registration_date": row[4],
-            "collection_id": row[5],
-            "owner_id": row[6]
-        }
-        
-        return jsonify({
-            "card": card_data
-        })
-        
-    except Exception as e:
-        return jsonify({"error": str(e)}), 500
+    card_data = _card_payload(access_key)
+    if card_data is None:
+        return ojson({"error": "Card not found"}, 404)
+    
+    return ojson({
+        "card": card_data
+    })
 
 @app.route('/api/user/<int:telegram_id>/cards', methods=['GET'])
 def get_user_cards(telegram_id):
@@ -386,34 +524,32 @@ def get_user_cards(telegram_id):
         ]
     }
     """
-    try:
-        user = User.get_by_telegram_id(telegram_id)
-        if not user:
-            return jsonify({"error": "User not found"}), 404
-        
-        cards = user.get_cards()
-        card_data = []
-        
-        for card in cards:
-            card_data.append({
-                "id": card.id,
-                "card_number": card.card_number,
-                "name": card.name,
-                "access_key": card.access_key,
-                "registration_date": card.registration_date,
-                "collection_id": card.collection_id
-            })
-        
-        return jsonify({
-            "user": {
-                "telegram_id": telegram_id,
-                "card_count": len(cards)
-            },
-            "cards": card_data
-        })
-        
-    except Exception as e:
-        return jsonify({"error": str(e)}), 500
+    _require_path_int("telegram_id", telegram_id)
+    limit, after = _parse_page()
+    
+    card_data = _user_cards(telegram_id, limit, after)
+    # card_count - все карты пользователя, а не только текущая страница
+    card_count = _user_card_count(telegram_id)
+    # Отличаем пользователя без карт от несуществующего только при нуле карт
+    if not card_count and not User.get_by_telegram_id(telegram_id):
+        return ojson({"error": "User not found"}, 404)
+    
+    return ojson({
+        "user": {
+            "telegram_id": telegram_id,
+            "card_count": card_count
+        },
+        "cards": card_data,
+        "next_cursor": _next_cursor(card_data, limit)
+    })
+
+_Q_AIRDROP_USER_CARDS = """
+    SELECT c.id, c.card_number, c.name, c.access_key, c.registration_date, c.collection_id
+    FROM cards c
+    JOIN airdrop_cards ac ON c.id = ac.card_id
+    WHERE ac.airdrop_id = ? AND c.owner_id = ?
+"""
+_AIRDROP_CARD_COLS = ("id", "card_number", "name", "access_key", "registration_date", "collection_id")
 
 @app.route('/api/check-airdrop', methods=['POST'])
 def check_airdrop():
@@ -451,94 +587,169 @@ def check_airdrop():
         "claimed_cards": 2
     }
     """
-    try:
-        data = request.get_json()
-        if not data or 'telegram_id' not in data or 'airdrop_id' not in data:
-            return jsonify({"error": "telegram_id and airdrop_id are required"}), 400
-        
-        telegram_id = int(data['telegram_id'])
-        airdrop_id = int(data['airdrop_id'])
-        
-        # Получаем пользователя
-        user = User.get_by_telegram_id(telegram_id)
-        if not user:
-            return jsonify({
-                "has_airdrop_card": False,
-                "airdrop": None,
-                "user_cards": [],
-                "claimed_cards": 0,
-                "message": "User not found"
-            })
-        
-        # Получаем аирдроп
-        airdrop = Airdrop.get_by_id(airdrop_id)
-        if not airdrop:
-            return jsonify({
-                "has_airdrop_card": False,
-                "airdrop": None,
-                "user_cards": [],
-                "claimed_cards": 0,
-                "message": "Airdrop not found"
-            })
-        
-        # Получаем все карты пользователя
-        user_cards = user.get_cards()
-        
-        # Получаем все карты из аирдропа
-        from database import get_db_cursor
-        with get_db_cursor() as cursor:
-            cursor.execute("""
-                SELECT c.* FROM cards c
-                JOIN airdrop_cards ac ON c.id = ac.card_id
-                WHERE ac.airdrop_id = ?
-            """, (airdrop_id,))
-            airdrop_card_rows = cursor.fetchall()
-            airdrop_cards = [Card.from_row(row) for row in airdrop_card_rows]
-        
-        # Находим карты пользователя из этого аирдропа
-        user_airdrop_cards = []
-        for card in user_cards:
-            if any(card.id == acard.id for acard in airdrop_cards):
-                user_airdrop_cards.append({
-                    "id": card.id,
-                    "card_number": card.card_number,
-                    "name": card.name,
-                    "access_key": card.access_key,
-                    "registration_date": card.registration_date,
-                    "collection_id": card.collection_id
-                })
-        
-        # Получаем количество забранных карт
-        with get_db_cursor() as cursor:
-            cursor.execute("""
-                SELECT COUNT(*) FROM airdrop_cards 
-                WHERE airdrop_id = ? AND is_reserved = 1
-            """, (airdrop_id,))
-            claimed_cards = cursor.fetchone()[0]
-        
-        # Формируем информацию об аирдропе
-        airdrop_info = {
-            "id": airdrop.id,
-            "name": airdrop.name,
-            "description": airdrop.description or "",
-            "creator_id": airdrop.creator_id,
-            "total_cards": airdrop.get_total_cards(),
-            "available_cards": airdrop.get_available_cards(),
-            "is_active": airdrop.is_active,
-            "created_at": airdrop.created_at
-        }
-        
-        return jsonify({
-            "has_airdrop_card": len(user_airdrop_cards) > 0,
-            "can_claim_more": len(user_airdrop_cards) == 0 and airdrop.is_active,
-            "airdrop": airdrop_info,
-            "user_cards": user_airdrop_cards,
-            "claimed_cards": claimed_cards,
-            "message": f"Found {len(user_airdrop_cards)} cards from airdrop {airdrop_id}"
+    telegram_id, airdrop_id = _require(request.get_json(silent=True), _AIRDROP_CHECK_SCHEMA)
+    
+    # Получаем пользователя
+    user = User.get_by_telegram_id(telegram_id)
+    if not user:
+        return ojson({
+            "has_airdrop_card": False,
+            "airdrop": None,
+            "user_cards": [],
+            "claimed_cards": 0,
+            "message": "User not found"
         })
-        
-    except Exception as e:
-        return jsonify({"error": str(e)}), 500
+    
+    # Получаем аирдроп
+    airdrop = Airdrop.get_by_id(airdrop_id)
+    if not airdrop:
+        return ojson({
+            "has_airdrop_card": False,
+            "airdrop": None,
+            "user_cards": [],
+            "claimed_cards": 0,
+            "message": "Airdrop not found"
+        })
+    
+    # Счётчики карт хранятся в самом аирдропе (триггеры, миграция 1.16.0)
+    # и уже загружены вместе с ним
+    total_cards, available_cards = airdrop.get_card_counts()
+    claimed_cards = total_cards - available_cards
+    
+    # Карты пользователя из аирдропа (owner_id хранит telegram_id владельца, как и в User.get_cards)
+    rows = get_request_conn().execute(_Q_AIRDROP_USER_CARDS, (airdrop_id, user.telegram_id))
+    user_airdrop_cards = [dict(zip(_AIRDROP_CARD_COLS, row)) for row in rows]
+    
+    # Формируем информацию об аирдропе
+    airdrop_info = {
+        "id": airdrop.id,
+        "name": airdrop.name,
+        "description": airdrop.description or "",
+        "creator_id": airdrop.creator_id,
+        "total_cards": total_cards,
+        "available_cards": available_cards,
+        "is_active": airdrop.is_active,
+        "created_at": airdrop.created_at
+    }
+    
+    return ojson({
+        "has_airdrop_card": len(user_airdrop_cards) > 0,
+        "can_claim_more": len(user_airdrop_cards) == 0 and airdrop.is_active,
+        "airdrop": airdrop_info,
+        "user_cards": user_airdrop_cards,
+        "claimed_cards": claimed_cards,
+        "message": f"Found {len(user_airdrop_cards)} cards from airdrop {airdrop_id}"
+    })
+
+# Документация не зависит от запроса, поэтому сериализуем её один раз при импорте
+_DOCS_PAYLOAD = {
+    "title": "AURA Cards API",
+    "version": "1.1.0",
+    "description": "API для интеграции с AURA Cards - системой генерации ID карт",
+    "base_url": API_BASE_URL,
+    "pagination": {
+        "description": "Списки отдаются страницами по limit элементов. Для следующей страницы "
+                       "передайте next_cursor из ответа в параметр after; null — страниц больше нет",
+        "default_limit": DEFAULT_PAGE_LIMIT,
+        "max_limit": MAX_PAGE_LIMIT
+    },
+    "endpoints": [
+        {
+            "path": "/api/health",
+            "method": "GET",
+            "description": "Проверка работоспособности API",
+            "parameters": [],
+            "example": f"{API_BASE_URL}/api/health"
+        },
+        {
+            "path": "/api/check-card",
+            "method": "POST",
+            "description": "Проверить наличие карт у пользователя",
+            "parameters": [
+                {"name": "telegram_id", "type": "integer", "required": True}
+            ],
+            "example": {
+                "url": f"{API_BASE_URL}/api/check-card",
+                "body": {"telegram_id": 123456789}
+            }
+        },
+        {
+            "path": "/api/check-collection",
+            "method": "POST", 
+            "description": "Проверить наличие карт из коллекции у пользователя",
+            "parameters": [
+                {"name": "telegram_id", "type": "integer", "required": True},
+                {"name": "collection_access_key", "type": "string", "required": True}
+            ],
+            "example": {
+                "url": f"{API_BASE_URL}/api/check-collection",
+                "body": {
+                    "telegram_id": 123456789,
+                    "collection_access_key": "ABCD-EFGH-IJKL"
+                }
+            }
+        },
+        {
+            "path": "/api/check-airdrop",
+            "method": "POST", 
+            "description": "Проверить наличие карт из аирдропа у пользователя",
+            "parameters": [
+                {"name": "telegram_id", "type": "integer", "required": True},
+                {"name": "airdrop_id", "type": "integer", "required": True}
+            ],
+            "example": {
+                "url": f"{API_BASE_URL}/api/check-airdrop",
+                "body": {
+                    "telegram_id": 123456789,
+                    "airdrop_id": 1
+                }
+            }
+        },
+        {
+            "path": "/api/collections",
+            "method": "GET",
+            "description": "Получить список всех коллекций",
+            "parameters": [
+                {"name": "limit", "type": "integer", "required": False},
+                {"name": "after", "type": "integer", "required": False}
+            ],
+            "example": f"{API_BASE_URL}/api/collections"
+        },
+        {
+            "path": "/api/collections/<id>",
+            "method": "GET", 
+            "description": "Получить детальную информацию о коллекции",
+            "parameters": [
+                {"name": "id", "type": "integer", "required": True},
+                {"name": "limit", "type": "integer", "required": False},
+                {"name": "after", "type": "integer", "required": False}
+            ],
+            "example": f"{API_BASE_URL}/api/collections/1"
+        },
+        {
+            "path": "/api/cards/<access_key>",
+            "method": "GET",
+            "description": "Получить карту по access key",
+            "parameters": [
+                {"name": "access_key", "type": "string", "required": True}
+            ],
+            "example": f"{API_BASE_URL}/api/cards/ABCD-EFGH-IJKL"
+        },
+        {
+            "path": "/api/user/<telegram_id>/cards",
+            "method": "GET",
+            "description": "Получить все карты пользователя",
+            "parameters": [
+                {"name": "telegram_id", "type": "integer", "required": True},
+                {"name": "limit", "type": "integer", "required": False},
+                {"name": "after", "type": "integer", "required": False}
+            ],
+            "example": f"{API_BASE_URL}/api/user/123456789/cards"
+        }
+    ]
+}
+_DOCS_BYTES = orjson.dumps(_DOCS_PAYLOAD)
+_DOCS_ETAG = hashlib.md5(_DOCS_BYTES).hexdigest()[:16]
 
 @app.route('/api/docs', methods=['GET'])
 def api_docs():
@@ -553,112 +764,50 @@ def api_docs():
         "endpoints": [...]
     }
     """
-    return jsonify({
-        "title": "AURA Cards API",
-        "version": "1.1.0",
-        "description": "API для интеграции с AURA Cards - системой генерации ID карт",
-        "base_url": API_BASE_URL,
-        "endpoints": [
-            {
-                "path": "/api/health",
-                "method": "GET",
-                "description": "Проверка работоспособности API",
-                "parameters": [],
-                "example": f"{API_BASE_URL}/api/health"
-            },
-            {
-                "path": "/api/check-card",
-                "method": "POST",
-                "description": "Проверить наличие карт у пользователя",
-                "parameters": [
-                    {"name": "telegram_id", "type": "integer", "required": True}
-                ],
-                "example": {
-                    "url": f"{API_BASE_URL}/api/check-card",
-                    "body": {"telegram_id": 123456789}
-                }
-            },
-            {
-                "path": "/api/check-collection",
-                "method": "POST", 
-                "description": "Проверить наличие карт из коллекции у пользователя",
-                "parameters": [
-                    {"name": "telegram_id", "type": "integer", "required": True},
-                    {"name": "collection_access_key", "type": "string", "required": True}
-                ],
-                "example": {
-                    "url": f"{API_BASE_URL}/api/check-collection",
-                    "body": {
-                        "telegram_id": 123456789,
-                        "collection_access_key": "ABCD-EFGH-IJKL"
-                    }
-                }
-            },
-            {
-                "path": "/api/check-airdrop",
-                "method": "POST", 
-                "description": "Проверить наличие карт из аирдропа у пользователя",
-                "parameters": [
-                    {"name": "telegram_id", "type": "integer", "required": True},
-                    {"name": "airdrop_id", "type": "integer", "required": True}
-                ],
-                "example": {
-                    "url": f"{API_BASE_URL}/api/check-airdrop",
-                    "body": {
-                        "telegram_id": 123456789,
-                        "airdrop_id": 1
-                    }
-                }
-            },
-            {
-                "path": "/api/collections",
-                "method": "GET",
-                "description": "Получить список всех коллекций",
-                "parameters": [],
-                "example": f"{API_BASE_URL}/api/collections"
-            },
-            {
-                "path": "/api/collections/<id>",
-                "method": "GET", 
-                "description": "Получить детальную информацию о коллекции",
-                "parameters": [
-                    {"name": "id", "type": "integer", "required": True}
-                ],
-                "example": f"{API_BASE_URL}/api/collections/1"
-            },
-            {
-                "path": "/api/cards/<access_key>",
-                "method": "GET",
-                "description": "Получить карту по access key",
-                "parameters": [
-                    {"name": "access_key", "type": "string", "required": True}
-                ],
-                "example": f"{API_BASE_URL}/api/cards/ABCD-EFGH-IJKL"
-            },
-            {
-                "path": "/api/user/<telegram_id>/cards",
-                "method": "GET",
-                "description": "Получить все карты пользователя",
-                "parameters": [
-                    {"name": "telegram_id", "type": "integer", "required": True}
-                ],
-                "example": f"{API_BASE_URL}/api/user/123456789/cards"
-            }
-        ]
-    })
+    response = app.response_class(_DOCS_BYTES, mimetype='application/json')
+    response.set_etag(_DOCS_ETAG)
+    # Документация неизменна до перезапуска: повторные запросы получают 304
+    return response.make_conditional(request)
 
 def run_api_server():
-    """Запуск API сервера"""
+    """
+    Запуск API сервера
+    
+    Сервер выбирается переменной API_SERVER:
+        gevent  - gevent WSGIServer (по умолчанию)
+        uvicorn - uvicorn с uvloop и httptools поверх WsgiToAsgi
+                  (pip install "uvicorn[standard]" asgiref); однопоточный режим:
+                  WsgiToAsgi вызывает приложение через sync_to_async
+                  с thread_sensitive=True, поэтому запросы выполняются
+                  по одному в общем потоке
+    
+    Для продакшна используйте gunicorn с gevent-воркерами:
+        cd src && gunicorn api_server:app
+    (настройки в gunicorn.conf.py)
+    """
     logging.basicConfig(level=logging.INFO)
-    logger = logging.getLogger(__name__)
     
     # Initialize database
     init_db()
+    start_optimize_timer()
+    start_cleanup_timer()
     
-    logger.info(f"Starting AURA Cards API server on {FLASK_HOST}:{FLASK_PORT}")
+    logger.info(f"Starting AURA Cards API server ({API_SERVER}) on {FLASK_HOST}:{FLASK_PORT}")
     logger.info(f"API documentation available at {API_BASE_URL}/api/docs")
     
-    app.run(host=FLASK_HOST, port=FLASK_PORT, debug=False)
+    if API_SERVER == "uvicorn":
+        import uvicorn
+        from asgiref.wsgi import WsgiToAsgi
+        
+        logger.warning("API_SERVER=uvicorn serves requests one at a time; use gevent or gunicorn for concurrency")
+        uvicorn.run(WsgiToAsgi(app), host=FLASK_HOST, port=FLASK_PORT,
+                    loop="uvloop", http="httptools", log_level="info")
+    elif API_SERVER == "gevent":
+        from gevent.pywsgi import WSGIServer
+        
+        WSGIServer((FLASK_HOST, FLASK_PORT), app).serve_forever()
+    else:
+        raise ValueError(f"Unknown API_SERVER: {API_SERVER!r} (expected 'gevent' or 'uvicorn')")
 
 if __name__ == "__main__":
     run_api_server()
@@ -0,0 +1,156 @@
+import json
+import logging
+import threading
+import time
+from functools import wraps
+from cachetools import TTLCache
+from config import REDIS_URL, CACHE_STALE_TTL
+
+logger = logging.getLogger(__name__)
+
+CACHE_PREFIX = "api:cache"
+
+_redis_client = None
+
+# Кэши в памяти процесса по пространствам имён; очищаются вместе с записями в Redis
+_local_caches = {}
+
+# Flask импортируется только внутри cached() и его помощников: memoize и invalidate
+# используются моделями в database.py, которые загружаются и без Flask (бот, gunicorn.conf.py)
+
+def get_redis():
+    """Общий клиент Redis или None, если кэш отключён"""
+    global _redis_client
+    if not REDIS_URL:
+        return None
+    if _redis_client is None:
+        import redis
+        _redis_client = redis.Redis.from_url(REDIS_URL)
+    return _redis_client
+
+def _cache_key(namespace):
+    """Ключ кэша из пути запроса и отсортированных параметров query string"""
+    from flask import request
+    args = "&".join(f"{k}={v}" for k, v in sorted(request.args.items()))
+    return f"{CACHE_PREFIX}:{namespace}:{request.path}?{args}"
+
+def _build_response(entry):
+    """Восстанавливает ответ Flask из хэша, сохранённого в Redis"""
+    from flask import request, current_app
+    headers = json.loads(entry[b"headers"])
+    response = current_app.response_class(entry[b"body"], status=int(entry[b"status"]), headers=headers)
+    # Закэшированный ответ с ETag по-прежнему отвечает 304 на If-None-Match
+    return response.make_conditional(request)
+
+def cached(ttl, namespace):
+    """
+    Кэширует ответ GET-эндпоинта в Redis на ttl секунд.
+    
+    Запись хранится ещё CACHE_STALE_TTL секунд после устаревания и
+    отдаётся, если эндпоинт завершился ошибкой (например, SQLite недоступна).
+    """
+    from flask import make_response
+    
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            client = get_redis()
+            if client is None:
+                return view(*args, **kwargs)
+            
+            key = _cache_key(namespace)
+            try:
+                entry = client.hgetall(key)
+            except Exception as e:
+                logger.warning(f"Redis cache read failed: {e}")
+                return view(*args, **kwargs)
+            
+            if entry and float(entry[b"stale_at"]) > time.time():
+                return _build_response(entry)
+            
+            try:
+                response = view(*args, **kwargs)
+            except Exception:
+                if not entry:
+                    raise
+                # Отдаём устаревшую копию, пока база недоступна
+                logger.exception(f"Serving stale cache entry for {key}")
+                return _build_response(entry)
+            if isinstance(response, tuple):
+                response = make_response(response)
+            
+            if response.status_code >= 500 and entry:
+                # Отдаём устаревшую копию, пока база недоступна
+                return _build_response(entry)
+            
+            if response.status_code == 200:
+                try:
+                    pipe = client.pipeline()
+                    pipe.hset(key, mapping={
+                        "body": response.get_data(),
+                        "status": response.status_code,
+                        "headers": json.dumps([
+                            (name, value) for name, value in response.headers.items()
+                            if name != "Content-Length"
+                        ]),
+                        "stale_at": time.time() + ttl
+                    })
+                    pipe.expire(key, ttl + CACHE_STALE_TTL)
+                    pipe.execute()
+                except Exception as e:
+                    logger.warning(f"Redis cache write failed: {e}")
+            
+            return response
+        return wrapper
+    return decorator
+
+def memoize(ttl, namespace, maxsize=4096):
+    """
+    Кэширует результат функции в памяти процесса на ttl секунд.
+    
+    Ключ — позиционные аргументы; None тоже кэшируется, чтобы повторные
+    запросы несуществующих объектов не доходили до SQLite.
+    """
+    store = TTLCache(maxsize=maxsize, ttl=ttl)
+    lock = threading.Lock()
+    _local_caches.setdefault(namespace, []).append((store, lock))
+    
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args):
+            with lock:
+                if args in store:
+                    return store[args]
+            value = func(*args)
+            with lock:
+                store[args] = value
+            return value
+        return wrapper
+    return decorator
+
+def invalidate_local(*namespaces):
+    """Очищает только кэши memoize в памяти процесса для указанных пространств имён"""
+    for namespace in namespaces:
+        for store, lock in _local_caches.get(namespace, ()):
+            with lock:
+                store.clear()
+
+def invalidate(*namespaces):
+    """
+    Удаляет все закэшированные ответы в указанных пространствах имён.
+    
+    Чтобы сбросить кэш API из другого процесса (например, бота),
+    ему нужен тот же REDIS_URL, что и у API.
+    """
+    invalidate_local(*namespaces)
+    
+    client = get_redis()
+    if client is None:
+        return
+    try:
+        for namespace in namespaces:
+            keys = list(client.scan_iter(match=f"{CACHE_PREFIX}:{namespace}:*"))
+            if keys:
+                client.delete(*keys)
+    except Exception as e:
+        logger.warning(f"Redis cache invalidation failed: {e}")
@@ -4,17 +4,27 @@ from dotenv import load_dotenv
 
 # Загрузка переменных окружения
 env_path = Path(__file__).parent.parent / '.env'
-load_dotenv(env_path)
+if env_path.exists():
+    load_dotenv(env_path, override=False)
 
 # СЕКРЕТНЫЕ ДАННЫЕ БЕРЕМ ИЗ ПЕРЕМЕННЫХ ОКРУЖЕНИЯ
 # Если переменных нет, используем заглушки или пустые значения
 BOT_TOKEN = os.getenv("BOT_TOKEN", "your_bot_token_here")
 
-# Обработка списка админов из строки "123,456"
+# Обработка списка админов из строки "123,456" (frozenset для проверок "in" за O(1))
 admin_ids_str = os.getenv("ADMIN_IDS", "")
-ADMIN_IDS = [int(x) for x in admin_ids_str.split(",") if x.strip().isdigit()]
+ADMIN_IDS = frozenset(int(x) for x in admin_ids_str.split(",") if x.strip().isdigit())
 
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///aura_pro.db") # Можно изменить на своё название
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 8))  # Размер пула соединений SQLite на процесс
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", 5))  # Сколько секунд ждать свободное соединение
+CLEANUP_INTERVAL = int(os.getenv("CLEANUP_INTERVAL", 3600))  # Как часто удалять старые файлы карт, секунд
+OPTIMIZE_INTERVAL = int(os.getenv("OPTIMIZE_INTERVAL", 6 * 3600))  # Как часто запускать PRAGMA optimize, секунд
+
+# Поиск N+1 запросов в разработке: предупреждение, если один и тот же запрос
+# выполняется за время обработки HTTP-запроса NPLUSONE_THRESHOLD и более раз
+NPLUSONE = os.getenv("NPLUSONE") == "1"
+NPLUSONE_THRESHOLD = int(os.getenv("NPLUSONE_THRESHOLD", 3))
 
 CARD_CREATION_PRICE = 1  # Telegram Stars
 
@@ -28,6 +38,11 @@ ENGRAVING_COLORS = {
 FLASK_HOST = os.getenv("FLASK_HOST", "0.0.0.0")
 FLASK_PORT = int(os.getenv("FLASK_PORT", 20196))
 API_BASE_URL = os.getenv("API_BASE_URL", "https://144.31.164.141.sslip.io")
+API_SERVER = os.getenv("API_SERVER", "gevent")  # gevent или uvicorn (uvloop + httptools, запросы по одному)
+
+# Кэш ответов API в Redis (пустой REDIS_URL отключает кэш)
+REDIS_URL = os.getenv("REDIS_URL", "")
+CACHE_STALE_TTL = int(os.getenv("CACHE_STALE_TTL", 300))  # Сколько секунд хранить устаревший ответ
 
 # Пути к сервисам 
 SERVICE_DIR = os.getenv("SERVICE_DIR", "/root/aurabot") # Можно заменить на свой путьк проекту  
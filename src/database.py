@@ -1,94 +1,427 @@
 import sqlite3
 import os
+import atexit
 import json
 import secrets
 import string
 import hashlib
-import uuid
+import queue
+import re
+import threading
+from collections import Counter, defaultdict
 from datetime import datetime
 from typing import Optional, List, Dict, Any
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import contextmanager
+from functools import lru_cache
 from pathlib import Path
-from config import DATABASE_URL
+from config import DATABASE_URL, DB_POOL_SIZE, DB_POOL_TIMEOUT, NPLUSONE, CLEANUP_INTERVAL, OPTIMIZE_INTERVAL
+from cache import invalidate as invalidate_api_cache, invalidate_local, memoize
 
 # Extract database path from SQLAlchemy URL
 DB_PATH = DATABASE_URL.replace("sqlite:///", "")
 
+# Pooled connections are read-only; all writes go through the single writer connection
+_READER_URI = Path(DB_PATH).resolve().as_uri() + "?mode=ro"
+
+# The module-level pool, locks and thread-locals below are only greenlet-aware if this
+# module is first imported after gevent's monkey.patch_all() (see gunicorn.conf.py)
+
+# Bounded pool of reusable reader connections shared by read_cursor and the API
+_connection_pool = queue.Queue(maxsize=DB_POOL_SIZE)
+_pool_lock = threading.Lock()
+_pool_created = 0
+
+# One writer per process: SQLite allows a single writer at a time anyway, so writes
+# queue on this lock instead of contending for the file lock through busy_timeout
+_writer_lock = threading.RLock()
+_writer_conn = None
+
+# Per-thread (per-greenlet under gevent) statement counters for N+1 detection
+_query_log = threading.local()
+_SQL_LITERAL_RE = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+
+def _trace_query(sql):
+    """Count executed statements with bound values stripped back to placeholders"""
+    counts = getattr(_query_log, "counts", None)
+    if counts is not None:
+        counts[_SQL_LITERAL_RE.sub("?", " ".join(sql.split()))] += 1
+
+def start_query_log():
+    """Start counting statements executed by the current thread"""
+    _query_log.counts = Counter()
+
+def stop_query_log():
+    """Stop counting and return the statement counts collected since start_query_log()"""
+    counts = getattr(_query_log, "counts", None)
+    _query_log.counts = None
+    return counts or Counter()
+
+# Applied to every new connection. foreign_keys stays off: cards.owner_id holds
+# Telegram IDs while its FOREIGN KEY points at users.id
+_CONNECTION_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",      # readers don't block the writer
+    "PRAGMA synchronous=NORMAL",    # fsync only at checkpoints, safe with WAL
+    "PRAGMA cache_size=-16000",     # 16 MB page cache
+    "PRAGMA mmap_size=268435456",   # 256 MB memory-mapped reads
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA busy_timeout=5000",
+    "PRAGMA analysis_limit=1000",   # caps the work done by PRAGMA optimize
+    # wal_autocheckpoint is left at SQLite's default of 1000 pages
+)
+
+def _apply_pragmas(conn):
+    """Apply the per-connection pragma set"""
+    for pragma in _CONNECTION_PRAGMAS:
+        conn.execute(pragma)
+
 def get_db_connection():
     """Get a database connection"""
-    conn = sqlite3.connect(DB_PATH)
+    conn = sqlite3.connect(DB_PATH, cached_statements=256)
     conn.row_factory = sqlite3.Row  # Enable dict-like access
+    if NPLUSONE:
+        conn.set_trace_callback(_trace_query)
+    _apply_pragmas(conn)
+    return conn
+
+def _create_shared_connection(database, **kwargs):
+    """Open a connection that can be shared between threads/greenlets"""
+    # Larger statement cache so reused connections keep hot queries prepared.
+    # No detect_types: a BOOLEAN converter is a Python call per value on its bytes form,
+    # slower than bool() in the row mappers, and would also turn on the TIMESTAMP/DATE converters
+    conn = sqlite3.connect(database, check_same_thread=False, cached_statements=256, **kwargs)
+    conn.row_factory = sqlite3.Row
+    if NPLUSONE:
+        conn.set_trace_callback(_trace_query)
+    _apply_pragmas(conn)
+    return conn
+
+def _create_pooled_connection():
+    """Open a read-only connection for the reader pool"""
+    conn = _create_shared_connection(_READER_URI, uri=True)
+    # Besides mode=ro, refuse writes at the SQL level too (covers ATTACH and temp tables)
+    conn.execute("PRAGMA query_only=ON")
+    return conn
+
+def acquire_conn():
+    """Check a reader connection out of the pool, waiting up to DB_POOL_TIMEOUT when all are busy"""
+    global _pool_created
+    try:
+        conn = _connection_pool.get_nowait()
+    except queue.Empty:
+        with _pool_lock:
+            can_create = _pool_created < DB_POOL_SIZE
+            if can_create:
+                _pool_created += 1
+        if can_create:
+            try:
+                return _create_pooled_connection()
+            except sqlite3.Error:
+                with _pool_lock:
+                    _pool_created -= 1
+                raise
+        try:
+            conn = _connection_pool.get(timeout=DB_POOL_TIMEOUT)
+        except queue.Empty:
+            raise sqlite3.OperationalError("Timed out waiting for a pooled database connection")
+    # No liveness probe: local SQLite connections don't go stale while idle
+    return conn
+
+def return_conn(conn):
+    """Return a checked-out connection to the pool"""
+    global _pool_created
+    if conn.in_transaction:
+        conn.rollback()
+    try:
+        _connection_pool.put_nowait(conn)
+    except queue.Full:
+        conn.close()
+        with _pool_lock:
+            _pool_created -= 1
+
+def close_pool(optimize=False):
+    """Close the writer and all idle pooled connections (e.g. before forking worker processes)"""
+    global _pool_created, _writer_conn
+    with _writer_lock:
+        if _writer_conn is not None:
+            try:
+                if optimize:
+                    _writer_conn.execute("PRAGMA optimize")
+                _writer_conn.close()
+            except sqlite3.Error:
+                pass
+            _writer_conn = None
+    while True:
+        try:
+            conn = _connection_pool.get_nowait()
+        except queue.Empty:
+            break
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+        with _pool_lock:
+            _pool_created -= 1
+
+# Run PRAGMA optimize on the way out so the next start has fresh planner statistics
+atexit.register(close_pool, optimize=True)
+
+# Refresh planner statistics periodically in long-running processes
+_optimize_timer = None
+
+def optimize_db():
+    """Run PRAGMA optimize once on the writer connection"""
+    try:
+        # optimize may run ANALYZE, which writes sqlite_stat1
+        with write_cursor() as cursor:
+            cursor.execute("PRAGMA optimize=0x10002")
+    except sqlite3.Error as e:
+        print(f"PRAGMA optimize failed: {e}")
+
+def _schedule_optimize():
+    """Run PRAGMA optimize again after OPTIMIZE_INTERVAL seconds"""
+    global _optimize_timer
+    _optimize_timer = threading.Timer(OPTIMIZE_INTERVAL, _run_optimize)
+    _optimize_timer.daemon = True
+    _optimize_timer.start()
+
+def _run_optimize():
+    """Run PRAGMA optimize and schedule the next run"""
+    optimize_db()
+    _schedule_optimize()
+
+def start_optimize_timer():
+    """Start periodic PRAGMA optimize runs in single-process servers (gunicorn runs them from the master)"""
+    # The first run waits a full interval: init_db has only just refreshed the schema
+    if _optimize_timer is None:
+        _schedule_optimize()
+
+# Connection checked out by the current thread (per greenlet under gevent)
+_thread_state = threading.local()
+
+def pin_conn():
+    """Keep one pooled connection for the current thread until unpin_conn()"""
+    conn = getattr(_thread_state, "conn", None)
+    if conn is None:
+        conn = _thread_state.conn = acquire_conn()
     return conn
 
+def unpin_conn():
+    """Return the current thread's pinned connection to the pool"""
+    conn = getattr(_thread_state, "conn", None)
+    if conn is not None:
+        _thread_state.conn = None
+        return_conn(conn)
+
 @contextmanager
-def get_db_cursor():
-    """Context manager for database operations"""
-    conn = get_db_connection()
+def read_cursor():
+    """Context manager for read-only database operations on a pooled reader connection
+
+    Stays synchronous: every view is a plain WSGI view and gevent workers make
+    the pool wait cooperative. The uvicorn mode runs the app through WsgiToAsgi,
+    which calls it via sync_to_async(thread_sensitive=True) on a single thread
+    off the event loop, so DB calls never block the loop (but requests run one at a time).
+    """
+    # Reuse the thread's pinned connection; otherwise check one out just for this block
+    conn = getattr(_thread_state, "conn", None)
+    acquired = conn is None
+    if acquired:
+        conn = _thread_state.conn = acquire_conn()
+    # Nested blocks share the outermost transaction on the same connection
+    depth = getattr(_thread_state, "depth", 0)
+    _thread_state.depth = depth + 1
+    cursor = conn.cursor()
     try:
-        cursor = conn.cursor()
         yield cursor
-        conn.commit()
+        if depth == 0:
+            conn.commit()
     except Exception:
-        conn.rollback()
+        if depth == 0:
+            conn.rollback()
         raise
     finally:
-        conn.close()
+        cursor.close()
+        _thread_state.depth = depth
+        if acquired:
+            unpin_conn()
+
+# Nesting depth of write_cursor blocks in the current thread
+_writer_state = threading.local()
+
+@contextmanager
+def write_cursor():
+    """Context manager for database operations that modify data, on the writer connection"""
+    global _writer_conn
+    with _writer_lock:
+        if _writer_conn is None:
+            _writer_conn = _create_shared_connection(DB_PATH)
+        conn = _writer_conn
+        # Nested blocks share the outermost transaction
+        depth = getattr(_writer_state, "depth", 0)
+        _writer_state.depth = depth + 1
+        cursor = conn.cursor()
+        try:
+            yield cursor
+            if depth == 0:
+                conn.commit()
+        except Exception:
+            if depth == 0:
+                conn.rollback()
+            raise
+        finally:
+            cursor.close()
+            _writer_state.depth = depth
+
+@contextmanager
+def get_db_cursor():
+    """Kept for callers outside this module: a write_cursor() that accepts any statement
+
+    Every block waits on the single writer lock, so read-only callers should switch
+    to read_cursor(). A read_cursor() opened inside a write block runs on a separate
+    reader connection and does not see that block's uncommitted writes.
+    """
+    with write_cursor() as cursor:
+        yield cursor
+
+_ACCESS_KEY_CHARS = string.ascii_uppercase + string.digits
+# Bytes at or above this are rejected so every character stays equally likely
+_ACCESS_KEY_BYTE_LIMIT = 256 - 256 % len(_ACCESS_KEY_CHARS)
 
 def generate_access_key():
     """Generate access key in format XXXX-XXXX-XXXX using secure random"""
-    chars = string.ascii_uppercase + string.digits
-    parts = []
-    for _ in range(3):
-        part = ''.join(secrets.choice(chars) for _ in range(4))
-        parts.append(part)
-    return '-'.join(parts)
+    # One CSPRNG read covers all 12 characters in practice
+    chars = []
+    while len(chars) < 12:
+        chars.extend(_ACCESS_KEY_CHARS[b % len(_ACCESS_KEY_CHARS)]
+                     for b in secrets.token_bytes(16) if b < _ACCESS_KEY_BYTE_LIMIT)
+    key = ''.join(chars[:12])
+    return f"{key[:4]}-{key[4:8]}-{key[8:]}"
 
+@lru_cache(maxsize=1)
 def get_cards_directory():
-    """Get or create the cards directory using pathlib"""
+    """Get or create the cards directory using pathlib (resolved once per process)"""
     cards_dir = Path.cwd() / "cards"
     cards_dir.mkdir(exist_ok=True)
     return str(cards_dir)
 
+_CARD_FILE_PREFIXES = ('card_', 'background_card_', 'temp_bg_', 'collection_card_')
+
+_UNLINK_WORKERS = 8
+
+def _os_thread_pool(max_workers):
+    """Executor backed by real OS threads, also when gevent has patched threading into greenlets"""
+    from gevent import monkey
+    if monkey.is_module_patched("threading"):
+        # Patched threads would run the blocking scandir/unlink calls on the hub and stall requests
+        from gevent.threadpool import ThreadPoolExecutor as HubThreadPoolExecutor
+        return HubThreadPoolExecutor(max_workers=max_workers)
+    return ThreadPoolExecutor(max_workers=max_workers)
+
+def _unlink_quiet(path):
+    """Remove a file, returning False if it could not be removed"""
+    try:
+        os.remove(path)
+    except OSError:
+        return False
+    return True
+
+def _stale_pngs(directory, prefixes, cutoff):
+    """Paths of prefix*.png files in directory last modified before cutoff"""
+    try:
+        entries = os.scandir(directory)
+    except OSError:
+        return []
+    stale = []
+    with entries:
+        for entry in entries:
+            name = entry.name
+            if not (name.endswith('.png') and name.startswith(prefixes)):
+                continue
+            try:
+                if entry.is_file() and entry.stat().st_mtime < cutoff:
+                    stale.append(entry.path)
+            except OSError:
+                pass
+    return stale
+
+def _remove_old_pngs(pool, directory, prefixes, cutoff, label):
+    """Remove stale prefix*.png files in directory, doing all file system work on pool"""
+    stale = pool.submit(_stale_pngs, directory, prefixes, cutoff).result()
+    # Overlap the unlink syscalls instead of issuing them one after another
+    for path, removed in zip(stale, pool.map(_unlink_quiet, stale)):
+        if removed:
+            print(f"Removed old {label} file: {path}")
+
 def cleanup_old_temp_files(max_age_hours=24):
     """Clean up temporary card files older than specified hours"""
     import tempfile
-    import glob
     import time
     
-    current_time = time.time()
-    max_age_seconds = max_age_hours * 3600
-    
-    # Clean cards directory
-    cards_dir = get_cards_directory()
-    card_files = glob.glob(os.path.join(cards_dir, 'card_*.png'))
-    card_files.extend(glob.glob(os.path.join(cards_dir, 'background_card_*.png')))
-    card_files.extend(glob.glob(os.path.join(cards_dir, 'temp_bg_*.png')))
-    card_files.extend(glob.glob(os.path.join(cards_dir, 'collection_card_*.png')))
+    cutoff = time.time() - max_age_hours * 3600
     
-    for card_file in card_files:
-        try:
-            file_age = current_time - os.path.getmtime(card_file)
-            if file_age > max_age_seconds:
-                os.remove(card_file)
-                print(f"Removed old card file: {card_file}")
-        except:
-            pass
-    
-    # Clean temp directory (for any remaining temp files)
-    temp_dir = tempfile.gettempdir()
-    temp_files = glob.glob(os.path.join(temp_dir, 'card_*.png'))
-    for temp_file in temp_files:
-        try:
-            file_age = current_time - os.path.getmtime(temp_file)
-            if file_age > max_age_seconds:
-                os.remove(temp_file)
-                print(f"Removed old temp file: {temp_file}")
-        except:
-            pass
+    with _os_thread_pool(_UNLINK_WORKERS) as pool:
+        # Clean cards directory
+        _remove_old_pngs(pool, get_cards_directory(), _CARD_FILE_PREFIXES, cutoff, "card")
+        
+        # Clean temp directory (for any remaining temp files)
+        _remove_old_pngs(pool, tempfile.gettempdir(), ('card_',), cutoff, "temp")
+
+_cleanup_timer = None
+
+def _run_cleanup():
+    """Remove stale card files and schedule the next run"""
+    global _cleanup_timer
+    try:
+        cleanup_old_temp_files()
+    except Exception as e:
+        print(f"Temp file cleanup failed: {e}")
+    _cleanup_timer = threading.Timer(CLEANUP_INTERVAL, _run_cleanup)
+    _cleanup_timer.daemon = True
+    _cleanup_timer.start()
+
+def start_cleanup_timer():
+    """Start hourly card file cleanup in the background (single-process servers; gunicorn runs it from the master)"""
+    global _cleanup_timer
+    if _cleanup_timer is None:
+        # First pass also runs off the calling thread so startup is not delayed
+        _cleanup_timer = threading.Timer(0, _run_cleanup)
+        _cleanup_timer.daemon = True
+        _cleanup_timer.start()
+
+def _schema_columns(cursor):
+    """Map every table name to its set of column names with a single introspection query"""
+    cursor.execute("""
+        SELECT m.name, p.name FROM sqlite_master m
+        JOIN pragma_table_info(m.name) p
+        WHERE m.type = 'table'
+    """)
+    existing_cols = defaultdict(set)
+    for table, column in cursor.fetchall():
+        existing_cols[table].add(column)
+    return existing_cols
+
+def parse_version(version: str):
+    """Convert a migration version like '1.10.0' into a comparable tuple"""
+    return tuple(int(part) for part in version.split("."))
+
+# UPSERT needs SQLite 3.24 and RETURNING 3.35 (User.save, AirdropCard.claim/reserve_card, Card transfers)
+MIN_SQLITE_VERSION = (3, 35, 0)
+
+def check_sqlite_version():
+    """Fail at startup instead of with a syntax error mid-request when the linked SQLite is too old"""
+    if sqlite3.sqlite_version_info < MIN_SQLITE_VERSION:
+        required = ".".join(map(str, MIN_SQLITE_VERSION))
+        raise RuntimeError(f"SQLite {required}+ is required, but Python is linked against SQLite {sqlite3.sqlite_version}")
 
 def init_db():
     """Initialize database tables with migration support"""
-    with get_db_cursor() as cursor:
+    check_sqlite_version()
+    # WAL and the other pragmas are applied when pooled connections are opened
+    with write_cursor() as cursor:
+        # sqlite3 only opens transactions implicitly before DML, so without an explicit
+        # BEGIN every CREATE/ALTER would autocommit; run the whole chain as one transaction
+        cursor.execute("BEGIN")
+        
         # Create migration table if not exists
         cursor.execute("""
             CREATE TABLE IF NOT EXISTS schema_migrations (
@@ -98,44 +431,85 @@ def init_db():
         """)
         
         # Get current migration version
-        cursor.execute("SELECT version FROM schema_migrations ORDER BY version DESC LIMIT 1")
-        migration_row = cursor.fetchone()
-        current_version = migration_row[0] if migration_row else "0.0.0"
+        # Compare versions numerically: as strings "1.10.0" would sort before "1.9.0"
+        cursor.execute("SELECT version FROM schema_migrations")
+        current_version = max((parse_version(row[0]) for row in cursor.fetchall()), default=(0, 0, 0))
         
         # Apply migrations based on version
-        if current_version < "1.0.0":
+        if current_version < (1, 0, 0):
             # Initial database setup
             migrate_to_v1_0_0(cursor)
         
-        if current_version < "1.1.0":
+        # Column sets of all tables, read once instead of a PRAGMA table_info per migration
+        existing_cols = _schema_columns(cursor)
+        
+        if current_version < (1, 1, 0):
             # Add collection links table
-            migrate_to_v1_1_0(cursor)
+            migrate_to_v1_1_0(cursor, existing_cols)
         
-        if current_version < "1.2.0":
+        if current_version < (1, 2, 0):
             # Add access_key column to cards table
-            migrate_to_v1_2_0(cursor)
+            migrate_to_v1_2_0(cursor, existing_cols)
         
-        if current_version < "1.3.0":
+        if current_version < (1, 3, 0):
             # Add reservation_status column to collections table
-            migrate_to_v1_3_0(cursor)
+            migrate_to_v1_3_0(cursor, existing_cols)
 
-        if current_version < "1.4.0":
-            migrate_to_v1_4_0(cursor)
+        if current_version < (1, 4, 0):
+            migrate_to_v1_4_0(cursor, existing_cols)
         
-        if current_version < "1.5.0":
+        if current_version < (1, 5, 0):
             # Add star_price column to cards table
-            migrate_to_v1_5_0(cursor)
+            migrate_to_v1_5_0(cursor, existing_cols)
         
-        if current_version < "1.6.0":
+        if current_version < (1, 6, 0):
             # Add airdrops table
             migrate_to_v1_6_0(cursor)
+            # Pick up the tables created by this migration
+            existing_cols = _schema_columns(cursor)
         
-        if current_version < "1.7.0":
+        if current_version < (1, 7, 0):
             # Add cover_image column to airdrops table
-            migrate_to_v1_7_0(cursor)
+            migrate_to_v1_7_0(cursor, existing_cols)
+        
+        if current_version < (1, 8, 0):
+            # Add composite index for per-owner collection lookups
+            migrate_to_v1_8_0(cursor)
+        
+        if current_version < (1, 9, 0):
+            # Add index on cards.owner_id
+            migrate_to_v1_9_0(cursor)
+        
+        if current_version < (1, 10, 0):
+            # Add indexes backing the API lookups
+            migrate_to_v1_10_0(cursor)
+        
+        if current_version < (1, 11, 0):
+            # Add materialized card_count column to collections table
+            migrate_to_v1_11_0(cursor, existing_cols)
+        
+        if current_version < (1, 12, 0):
+            # Add index for per-airdrop card lookups
+            migrate_to_v1_12_0(cursor)
+        
+        if current_version < (1, 13, 0):
+            # Add indexes for card number and trade link lookups
+            migrate_to_v1_13_0(cursor)
+        
+        if current_version < (1, 14, 0):
+            # Add index for per-airdrop available card counts
+            migrate_to_v1_14_0(cursor)
+        
+        if current_version < (1, 15, 0):
+            # Add covering indexes for airdrop card and active airdrop reads
+            migrate_to_v1_15_0(cursor)
+        
+        if current_version < (1, 16, 0):
+            # Add materialized card counters to airdrops table
+            migrate_to_v1_16_0(cursor, existing_cols)
         
         # Update migration version
-        cursor.execute("INSERT OR REPLACE INTO schema_migrations (version) VALUES ('1.7.0')")
+        cursor.execute("INSERT OR REPLACE INTO schema_migrations (version) VALUES ('1.16.0')")
         
         # Verify database integrity
         cursor.execute("PRAGMA integrity_check")
@@ -208,7 +582,7 @@ def migrate_to_v1_0_0(cursor):
         )
     """)
 
-def migrate_to_v1_1_0(cursor):
+def migrate_to_v1_1_0(cursor, existing_cols):
     """Add collection links table migration"""
     # Collection links table
     cursor.execute("""
@@ -225,38 +599,30 @@ def migrate_to_v1_1_0(cursor):
     """)
     
     # Add description column to collections if not exists
-    cursor.execute("PRAGMA table_info(collections)")
-    columns = [col[1] for col in cursor.fetchall()]
-    if 'description' not in columns:
+    if 'description' not in existing_cols['collections']:
         cursor.execute("ALTER TABLE collections ADD COLUMN description TEXT")
-    if 'is_published' not in columns:
+    if 'is_published' not in existing_cols['collections']:
         cursor.execute("ALTER TABLE collections ADD COLUMN is_published BOOLEAN DEFAULT 0")
 
-def migrate_to_v1_2_0(cursor):
+def migrate_to_v1_2_0(cursor, existing_cols):
     """Add access_key column to cards table migration"""
     # Add access_key column to cards table if not exists
-    cursor.execute("PRAGMA table_info(cards)")
-    columns = [col[1] for col in cursor.fetchall()]
-    if 'access_key' not in columns:
+    if 'access_key' not in existing_cols['cards']:
         cursor.execute("ALTER TABLE cards ADD COLUMN access_key TEXT")
 
-def migrate_to_v1_3_0(cursor):
+def migrate_to_v1_3_0(cursor, existing_cols):
     """Add reservation_status column to collections table migration"""
     # Add reservation_status column to collections table if not exists
-    cursor.execute("PRAGMA table_info(collections)")
-    columns = [col[1] for col in cursor.fetchall()]
-    if 'reservation_status' not in columns:
+    if 'reservation_status' not in existing_cols['collections']:
         cursor.execute("ALTER TABLE collections ADD COLUMN reservation_status TEXT DEFAULT 'available'")
-    if 'reserved_by' not in columns:
+    if 'reserved_by' not in existing_cols['collections']:
         cursor.execute("ALTER TABLE collections ADD COLUMN reserved_by INTEGER")
-    if 'reserved_at' not in columns:
+    if 'reserved_at' not in existing_cols['collections']:
         cursor.execute("ALTER TABLE collections ADD COLUMN reserved_at TEXT")
 
 
-def migrate_to_v1_4_0(cursor):
-    cursor.execute("PRAGMA table_info(collections)")
-    columns = [col[1] for col in cursor.fetchall()]
-    if 'link_id' not in columns:
+def migrate_to_v1_4_0(cursor, existing_cols):
+    if 'link_id' not in existing_cols['collections']:
         cursor.execute("ALTER TABLE collections ADD COLUMN link_id TEXT")
 
     cursor.execute("""
@@ -266,9 +632,13 @@ def migrate_to_v1_4_0(cursor):
 
     cursor.execute("SELECT id FROM collections WHERE link_id IS NULL OR link_id = ''")
     collections_without_link = cursor.fetchall()
-    for collection in collections_without_link:
-        new_link_id = str(uuid.uuid4().hex)[:16]
-        cursor.execute("UPDATE collections SET link_id = ? WHERE id = ?", (new_link_id, collection[0]))
+    # One random read for the whole batch, 8 bytes (16 hex chars) per link_id
+    raw = os.urandom(8 * len(collections_without_link))
+    cursor.executemany(
+        "UPDATE collections SET link_id = ? WHERE id = ?",
+        [(raw[i * 8:(i + 1) * 8].hex(), collection_id)
+         for i, (collection_id,) in enumerate(collections_without_link)]
+    )
 
 
 def migrate_to_v1_6_0(cursor):
@@ -301,24 +671,333 @@ def migrate_to_v1_6_0(cursor):
         )
     """)
 
-def migrate_to_v1_7_0(cursor):
+def migrate_to_v1_7_0(cursor, existing_cols):
     """Add cover_image column to airdrops table migration"""
-    cursor.execute("PRAGMA table_info(airdrops)")
-    columns = [col[1] for col in cursor.fetchall()]
-    if 'cover_image' not in columns:
+    if 'cover_image' not in existing_cols['airdrops']:
         cursor.execute("ALTER TABLE airdrops ADD COLUMN cover_image TEXT")
 
+def migrate_to_v1_8_0(cursor):
+    """Add composite index on cards(collection_id, owner_id) migration"""
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_cards_coll_owner
+        ON cards(collection_id, owner_id)
+    """)
+
+def migrate_to_v1_9_0(cursor):
+    """Add index on cards.owner_id migration"""
+    # users.telegram_id is already covered by its UNIQUE constraint
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_cards_owner
+        ON cards(owner_id)
+    """)
+
+def migrate_to_v1_10_0(cursor):
+    """Add indexes backing the API lookups migration"""
+    # cards(collection_id) lookups use idx_cards_coll_owner, users(telegram_id) its UNIQUE index
+    try:
+        cursor.execute("""
+            CREATE UNIQUE INDEX IF NOT EXISTS idx_cards_access_key
+            ON cards(access_key)
+        """)
+    except sqlite3.IntegrityError:
+        # Legacy databases may contain duplicate keys; index them without the constraint
+        print("Duplicate card access keys found, creating non-unique idx_cards_access_key")
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_cards_access_key
+            ON cards(access_key)
+        """)
+    
+    cursor.execute("ANALYZE")
+
+def migrate_to_v1_11_0(cursor, existing_cols):
+    """Add card_count column to collections table maintained by triggers migration"""
+    if 'card_count' not in existing_cols['collections']:
+        cursor.execute("ALTER TABLE collections ADD COLUMN card_count INTEGER NOT NULL DEFAULT 0")
+    
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_cards_ai AFTER INSERT ON cards
+        BEGIN
+            UPDATE collections SET card_count = card_count + 1 WHERE id = NEW.collection_id;
+        END
+    """)
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_cards_ad AFTER DELETE ON cards
+        BEGIN
+            UPDATE collections SET card_count = card_count - 1 WHERE id = OLD.collection_id;
+        END
+    """)
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_cards_au_collection AFTER UPDATE OF collection_id ON cards
+        WHEN OLD.collection_id IS NOT NEW.collection_id
+        BEGIN
+            UPDATE collections SET card_count = card_count - 1 WHERE id = OLD.collection_id;
+            UPDATE collections SET card_count = card_count + 1 WHERE id = NEW.collection_id;
+        END
+    """)
+    
+    # Backfill counters for existing collections
+    cursor.execute("""
+        UPDATE collections
+        SET card_count = (SELECT COUNT(*) FROM cards WHERE cards.collection_id = collections.id)
+    """)
+
+
+def migrate_to_v1_12_0(cursor):
+    """Add composite index on airdrop_cards(airdrop_id, card_id) migration"""
+    # Also serves the per-airdrop claimed/available counts via its airdrop_id prefix
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_airdrop_cards_aid
+        ON airdrop_cards(airdrop_id, card_id)
+    """)
+
+
+def migrate_to_v1_13_0(cursor):
+    """Add indexes on cards.card_number and trade_links(card_id, is_active, is_gift) migration"""
+    # access_key, owner_id and collection_id are indexed since 1.8.0-1.10.0;
+    # trade_links.link_id and collection_links.link_id are covered by their UNIQUE constraints
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_cards_card_number
+        ON cards(card_number)
+    """)
+    # Active trade links per card, as looked up by Collection.update_price
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_trade_links_card_active
+        ON trade_links(card_id, is_active, is_gift)
+    """)
+    
+    cursor.execute("ANALYZE")
+
 
-def migrate_to_v1_5_0(cursor):
+def migrate_to_v1_14_0(cursor):
+    """Add covering index on airdrop_cards(airdrop_id, is_reserved, card_id) migration"""
+    # Lets Airdrop.get_card_counts, the random pick and the available-card join in
+    # Airdrop.get_cards read airdrop_cards from the index alone
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_airdrop_cards_aid_reserved_card
+        ON airdrop_cards(airdrop_id, is_reserved, card_id)
+    """)
+
+
+def migrate_to_v1_15_0(cursor):
+    """Add index on airdrops(is_active, created_at) migration"""
+    # Active airdrops newest first for Airdrop.get_active_airdrops
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_airdrops_active_created
+        ON airdrops(is_active, created_at DESC)
+    """)
+    
+    cursor.execute("ANALYZE")
+
+
+def migrate_to_v1_16_0(cursor, existing_cols):
+    """Add total_cards and available_cards columns to airdrops table maintained by triggers migration"""
+    if 'total_cards' not in existing_cols['airdrops']:
+        cursor.execute("ALTER TABLE airdrops ADD COLUMN total_cards INTEGER NOT NULL DEFAULT 0")
+    if 'available_cards' not in existing_cols['airdrops']:
+        cursor.execute("ALTER TABLE airdrops ADD COLUMN available_cards INTEGER NOT NULL DEFAULT 0")
+    
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_airdrop_cards_ai AFTER INSERT ON airdrop_cards
+        BEGIN
+            UPDATE airdrops
+            SET total_cards = total_cards + 1,
+                available_cards = available_cards + (CASE WHEN NEW.is_reserved = 0 THEN 1 ELSE 0 END)
+            WHERE id = NEW.airdrop_id;
+        END
+    """)
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_airdrop_cards_ad AFTER DELETE ON airdrop_cards
+        BEGIN
+            UPDATE airdrops
+            SET total_cards = total_cards - 1,
+                available_cards = available_cards - (CASE WHEN OLD.is_reserved = 0 THEN 1 ELSE 0 END)
+            WHERE id = OLD.airdrop_id;
+        END
+    """)
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_airdrop_cards_au AFTER UPDATE OF airdrop_id, is_reserved ON airdrop_cards
+        WHEN OLD.airdrop_id IS NOT NEW.airdrop_id OR OLD.is_reserved IS NOT NEW.is_reserved
+        BEGIN
+            UPDATE airdrops
+            SET total_cards = total_cards - 1,
+                available_cards = available_cards - (CASE WHEN OLD.is_reserved = 0 THEN 1 ELSE 0 END)
+            WHERE id = OLD.airdrop_id;
+            UPDATE airdrops
+            SET total_cards = total_cards + 1,
+                available_cards = available_cards + (CASE WHEN NEW.is_reserved = 0 THEN 1 ELSE 0 END)
+            WHERE id = NEW.airdrop_id;
+        END
+    """)
+    
+    # Backfill counters for existing airdrops
+    cursor.execute("""
+        UPDATE airdrops
+        SET total_cards = (SELECT COUNT(*) FROM airdrop_cards WHERE airdrop_cards.airdrop_id = airdrops.id),
+            available_cards = (SELECT COUNT(*) FROM airdrop_cards
+                               WHERE airdrop_cards.airdrop_id = airdrops.id AND is_reserved = 0)
+    """)
+
+
+def migrate_to_v1_5_0(cursor, existing_cols):
     """Add star_price column to cards table migration"""
-    cursor.execute("PRAGMA table_info(cards)")
-    columns = [col[1] for col in cursor.fetchall()]
-    if 'star_price' not in columns:
+    if 'star_price' not in existing_cols['cards']:
         cursor.execute("ALTER TABLE cards ADD COLUMN star_price INTEGER DEFAULT 1")
     
     # Set default star_price for existing cards
     cursor.execute("UPDATE cards SET star_price = 1 WHERE star_price IS NULL")
 
+# SQL for the hot model paths, kept as constants so every call sends identical
+# text and hits the connection's prepared-statement cache
+_SQL_INSERT_CARD = """
+    INSERT INTO cards (card_number, name, owner_id, registration_date, expires,
+                       engraving_color, has_background, collection_id, created_at, access_key, star_price)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+_SQL_INSERT_AIRDROP = """
+    INSERT INTO airdrops (name, description, creator_id, message_id, chat_id, is_active, created_at)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+"""
+_SQL_INSERT_AIRDROP_CARD = """
+    INSERT INTO airdrop_cards (airdrop_id, card_id, is_reserved, reserved_by, reserved_at)
+    VALUES (?, ?, ?, ?, ?)
+"""
+_SQL_UPDATE_AIRDROP_CARD = "UPDATE airdrop_cards SET is_reserved = ?, reserved_by = ?, reserved_at = ? WHERE id = ?"
+# UTC timestamp in the datetime.isoformat() layout the models write (millisecond precision)
+_SQL_NOW = "strftime('%Y-%m-%dT%H:%M:%f', 'now')"
+_SQL_RESERVE_AIRDROP_CARD = f"""
+    UPDATE airdrop_cards SET is_reserved = 1, reserved_by = ?, reserved_at = {_SQL_NOW}
+    WHERE id = ?
+    RETURNING reserved_at
+"""
+_SQL_CLAIM_AIRDROP_CARD = f"""
+    UPDATE airdrop_cards SET is_reserved = 1, reserved_by = ?, reserved_at = {_SQL_NOW}
+    WHERE id = (
+        SELECT id FROM airdrop_cards
+        WHERE airdrop_id = ? AND is_reserved = 0
+        LIMIT 1 OFFSET COALESCE((
+            SELECT abs(random()) % max(available_cards, 1) FROM airdrops WHERE id = ?
+        ), 0)
+    )
+    RETURNING card_id
+"""
+_USER_TUPLE_COLUMNS = "id, telegram_id, username, first_name, is_admin, created_at"
+# total_cards and available_cards are maintained by triggers on airdrop_cards (migration 1.16.0)
+_AIRDROP_TUPLE_COLUMNS = ("id, name, description, creator_id, message_id, chat_id, is_active, created_at, "
+                          "total_cards, available_cards")
+_SQL_AIRDROP_BY_ID = f"SELECT {_AIRDROP_TUPLE_COLUMNS} FROM airdrops WHERE id = ?"
+_SQL_ACTIVE_AIRDROPS = f"SELECT {_AIRDROP_TUPLE_COLUMNS} FROM airdrops WHERE is_active = 1 ORDER BY created_at DESC"
+_AIRDROP_TUPLE_WIDTH = len(_AIRDROP_TUPLE_COLUMNS.split(", "))
+# Creators are users.id, as in Airdrop.get_creator
+_SQL_ACTIVE_AIRDROPS_WITH_CREATORS = f"""
+    SELECT {", ".join("a." + col for col in _AIRDROP_TUPLE_COLUMNS.split(", "))},
+           {", ".join("u." + col for col in _USER_TUPLE_COLUMNS.split(", "))}
+    FROM airdrops a
+    LEFT JOIN users u ON u.id = a.creator_id
+    WHERE a.is_active = 1
+    ORDER BY a.created_at DESC
+"""
+_AIRDROP_CARD_TUPLE_COLUMNS = "id, airdrop_id, card_id, is_reserved, reserved_by, reserved_at"
+# The random OFFSET comes from the trigger-maintained airdrops.available_cards counter
+# (migration 1.16.0), an O(1) primary key lookup instead of counting the available rows;
+# COALESCE covers a missing airdrop row, since OFFSET NULL is a datatype mismatch
+_SQL_RANDOM_AVAILABLE_AIRDROP_CARD = f"""
+    SELECT {_AIRDROP_CARD_TUPLE_COLUMNS} FROM airdrop_cards
+    WHERE airdrop_id = ? AND is_reserved = 0
+    LIMIT 1 OFFSET COALESCE((
+        SELECT abs(random()) % max(available_cards, 1) FROM airdrops WHERE id = ?
+    ), 0)
+"""
+_SQL_AIRDROP_CARD_COUNTS = "SELECT total_cards, available_cards FROM airdrops WHERE id = ?"
+
+# List-returning reads fetch plain tuples (cursor.row_factory = None) with an explicit
+# column order, because SELECT * order depends on which migrations added the columns
+_CARD_TUPLE_COLUMNS = ("id, card_number, name, owner_id, registration_date, expires, engraving_color, "
+                       "has_background, collection_id, created_at, access_key, star_price")
+_SQL_CARDS_BY_OWNER = f"SELECT {_CARD_TUPLE_COLUMNS} FROM cards WHERE owner_id = ?"
+_SQL_CARDS_BY_COLLECTION = f"SELECT {_CARD_TUPLE_COLUMNS} FROM cards WHERE collection_id = ?"
+_SQL_CARDS_BY_COLLECTION_AND_OWNER = f"SELECT {_CARD_TUPLE_COLUMNS} FROM cards WHERE collection_id = ? AND owner_id = ?"
+_SQL_AVAILABLE_AIRDROP_CARDS = f"""
+    SELECT {", ".join("c." + col for col in _CARD_TUPLE_COLUMNS.split(", "))} FROM cards c
+    JOIN airdrop_cards ac ON c.id = ac.card_id
+    WHERE ac.airdrop_id = ? AND ac.is_reserved = 0
+"""
+_CARD_TUPLE_WIDTH = len(_CARD_TUPLE_COLUMNS.split(", "))
+# owner_id holds the Telegram ID, so owners are matched on users.telegram_id
+_SQL_AVAILABLE_AIRDROP_CARDS_WITH_OWNERS = f"""
+    SELECT {", ".join("c." + col for col in _CARD_TUPLE_COLUMNS.split(", "))},
+           {", ".join("u." + col for col in _USER_TUPLE_COLUMNS.split(", "))}
+    FROM cards c
+    JOIN airdrop_cards ac ON c.id = ac.card_id
+    LEFT JOIN users u ON u.telegram_id = c.owner_id
+    WHERE ac.airdrop_id = ? AND ac.is_reserved = 0
+"""
+_TRADE_LINK_TUPLE_COLUMNS = "id, link_id, card_id, seller_id, price, is_gift, created_at, is_active"
+_SQL_ACTIVE_TRADE_LINKS = f"SELECT {_TRADE_LINK_TUPLE_COLUMNS} FROM trade_links WHERE is_active = 1"
+
+# Single-row lookups select the columns their from_row reads instead of SELECT *
+_COLLECTION_COLUMNS = "id, name, description, author_id, star_price, link_id, is_published, created_at"
+_COLLECTION_LINK_COLUMNS = "id, link_id, collection_id, seller_id, created_at, is_active"
+_SQL_USER_BY_TELEGRAM_ID = f"SELECT {_USER_TUPLE_COLUMNS} FROM users WHERE telegram_id = ?"
+_SQL_USER_BY_ID = f"SELECT {_USER_TUPLE_COLUMNS} FROM users WHERE id = ?"
+_SQL_CARD_BY_ID = f"SELECT {_CARD_TUPLE_COLUMNS} FROM cards WHERE id = ?"
+_SQL_CARD_BY_NUMBER = f"SELECT {_CARD_TUPLE_COLUMNS} FROM cards WHERE card_number = ?"
+_SQL_CARD_BY_ACCESS_KEY = f"SELECT {_CARD_TUPLE_COLUMNS} FROM cards WHERE access_key = ?"
+_SQL_TRANSFER_CARD = f"UPDATE cards SET owner_id = ? WHERE id = ? RETURNING {_CARD_TUPLE_COLUMNS}"
+_SQL_COLLECTION_BY_ID = f"SELECT {_COLLECTION_COLUMNS} FROM collections WHERE id = ?"
+_SQL_COLLECTIONS_BY_AUTHOR = f"SELECT {_COLLECTION_COLUMNS} FROM collections WHERE author_id = ?"
+_SQL_COLLECTION_BY_LINK_ID = f"SELECT {_COLLECTION_COLUMNS} FROM collections WHERE link_id = ?"
+# One idx_cards_access_key probe, then a primary key lookup; no JOIN/DISTINCT
+_SQL_COLLECTION_BY_CARD_ACCESS_KEY = f"""
+    SELECT {_COLLECTION_COLUMNS} FROM collections
+    WHERE id = (SELECT collection_id FROM cards WHERE access_key = ? LIMIT 1)
+"""
+_SQL_TRADE_LINK_BY_LINK_ID = f"SELECT {_TRADE_LINK_TUPLE_COLUMNS} FROM trade_links WHERE link_id = ?"
+_SQL_COLLECTION_LINK_BY_LINK_ID = f"SELECT {_COLLECTION_LINK_COLUMNS} FROM collection_links WHERE link_id = ?"
+_SQL_ACTIVE_COLLECTION_LINKS = f"SELECT {_COLLECTION_LINK_COLUMNS} FROM collection_links WHERE is_active = 1"
+
+def _fetch_tuples(cursor, sql, params=()):
+    """Run a query on cursor and return its rows as plain tuples"""
+    return _iter_tuples(cursor, sql, params).fetchall()
+
+def _iter_tuples(cursor, sql, params=()):
+    """Run a query on cursor and return the cursor itself to stream rows as plain tuples"""
+    cursor.row_factory = None
+    return cursor.execute(sql, params)
+
+# Ids bound per IN (...) query, well below SQLite's host parameter limit
+_IN_BATCH_SIZE = 500
+
+def _iter_by_ids(cursor, sql_prefix, ids):
+    """Stream tuple rows of sql_prefix + "(?, ...)" for unique ids, one query per _IN_BATCH_SIZE ids"""
+    ids = list(set(ids))
+    for start in range(0, len(ids), _IN_BATCH_SIZE):
+        chunk = ids[start:start + _IN_BATCH_SIZE]
+        yield from _iter_tuples(cursor, f"{sql_prefix} ({', '.join('?' * len(chunk))})", chunk)
+
+def _row_get(row, key, default):
+    """Column value from a sqlite3.Row, or default if the query did not select it"""
+    # Cheaper than probing row.keys(), which builds a new list on every call
+    try:
+        return row[key]
+    except IndexError:
+        return default
+
+# Memoize the immutable row tuples rather than model instances: every get_by_id call
+# builds a fresh object, so mutating one never leaks into later lookups
+@memoize(ttl=30, namespace="users")
+def _user_row_by_id(user_id):
+    with read_cursor() as cursor:
+        cursor.execute(_SQL_USER_BY_ID, (user_id,))
+        row = cursor.fetchone()
+        return tuple(row) if row else None
+
+@memoize(ttl=30, namespace="cards")
+def _card_row_by_id(card_id):
+    with read_cursor() as cursor:
+        cursor.execute(_SQL_CARD_BY_ID, (card_id,))
+        row = cursor.fetchone()
+        return tuple(row) if row else None
+
 class User:
     def __init__(self, telegram_id: int, username: str = None, first_name: str = None, is_admin: bool = False):
         self.telegram_id = telegram_id
@@ -329,51 +1008,74 @@ class User:
         self.id = None
     
     def save(self):
-        with get_db_cursor() as cursor:
+        with write_cursor() as cursor:
+            # UPSERT keeps the existing row (id and created_at) instead of deleting and reinserting it
             cursor.execute("""
-                INSERT OR REPLACE INTO users (telegram_id, username, first_name, is_admin, created_at)
-                VALUES (?, ?, ?, ?, COALESCE((SELECT created_at FROM users WHERE telegram_id = ?), ?))
-            """, (self.telegram_id, self.username, self.first_name, self.is_admin, self.telegram_id, self.created_at))
+                INSERT INTO users (telegram_id, username, first_name, is_admin, created_at)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(telegram_id) DO UPDATE SET
+                    username = excluded.username,
+                    first_name = excluded.first_name,
+                    is_admin = excluded.is_admin
+                RETURNING id
+            """, (self.telegram_id, self.username, self.first_name, self.is_admin, self.created_at))
             
-            if self.id is None:
-                self.id = cursor.lastrowid
-            return self
+            self.id = cursor.fetchone()[0]
+        # "users" only has in-process memoize entries, so skip the Redis SCAN
+        invalidate_local("users")
+        return self
     
     @classmethod
     def get_by_telegram_id(cls, telegram_id: int):
-        with get_db_cursor() as cursor:
-            cursor.execute("SELECT * FROM users WHERE telegram_id = ?", (telegram_id,))
+        with read_cursor() as cursor:
+            cursor.execute(_SQL_USER_BY_TELEGRAM_ID, (telegram_id,))
             row = cursor.fetchone()
-            if row:
-                user = cls(row['telegram_id'], row['username'], row['first_name'], bool(row['is_admin']))
-                user.id = row['id']
-                user.created_at = row['created_at']
-                return user
-            return None
+            return cls.from_row(row) if row else None
     
     @classmethod
     def get_by_id(cls, user_id: int):
-        with get_db_cursor() as cursor:
-            cursor.execute("SELECT * FROM users WHERE id = ?", (user_id,))
-            row = cursor.fetchone()
-            if row:
-                user = cls(row['telegram_id'], row['username'], row['first_name'], bool(row['is_admin']))
-                user.id = row['id']
-                user.created_at = row['created_at']
-                return user
-            return None
+        row = _user_row_by_id(user_id)
+        return cls.from_tuple(row) if row else None
+    
+    @classmethod
+    def get_by_ids(cls, user_ids) -> dict:
+        """Users by id for a batch of ids in one query per _IN_BATCH_SIZE ids; ids without a user are left out"""
+        with read_cursor() as cursor:
+            rows = _iter_by_ids(cursor, f"SELECT {_USER_TUPLE_COLUMNS} FROM users WHERE id IN", user_ids)
+            return {row[0]: cls.from_tuple(row) for row in rows}
+    
+    @classmethod
+    def from_row(cls, row):
+        user = cls.__new__(cls)
+        user.id = row['id']
+        user.telegram_id = row['telegram_id']
+        user.username = row['username']
+        user.first_name = row['first_name']
+        user.is_admin = bool(row['is_admin'])
+        user.created_at = row['created_at']
+        return user
+    
+    @classmethod
+    def from_tuple(cls, row):
+        """Build a user from a plain tuple in _USER_TUPLE_COLUMNS order"""
+        user = cls.__new__(cls)
+        user.id, user.telegram_id, user.username, user.first_name, is_admin, user.created_at = row
+        user.is_admin = bool(is_admin)
+        return user
     
     def get_cards(self):
-        with get_db_cursor() as cursor:
-            cursor.execute("SELECT * FROM cards WHERE owner_id = ?", (self.telegram_id,))
-            return [Card.from_row(row) for row in cursor.fetchall()]
+        with read_cursor() as cursor:
+            return list(map(Card.from_tuple, _iter_tuples(cursor, _SQL_CARDS_BY_OWNER, (self.telegram_id,))))
     
     def get_collections(self):
-        with get_db_cursor() as cursor:
-            cursor.execute("SELECT * FROM collections WHERE author_id = ?", (self.telegram_id,))
-            return [Collection.from_row(row) for row in cursor.fetchall()]
+        with read_cursor() as cursor:
+            cursor.execute(_SQL_COLLECTIONS_BY_AUTHOR, (self.telegram_id,))
+            return list(map(Collection.from_row, cursor))
 
 class Card:
+    __slots__ = ("id", "card_number", "name", "owner_id", "expires", "engraving_color", "has_background",
+                 "collection_id", "registration_date", "access_key", "star_price", "created_at")
+    
     def __init__(self, card_number: int, name: str, owner_id: int, expires: str = "Never", 
                  engraving_color: str = "white", has_background: bool = False, collection_id: int = None, registration_date: str = None, access_key: str = None, star_price: int = 1):
         self.card_number = card_number
@@ -389,16 +1091,15 @@ class Card:
         self.created_at = datetime.utcnow().isoformat()
         self.id = None
     
+    def _insert_params(self):
+        return (self.card_number, self.name, self.owner_id, self.registration_date, 
+                self.expires, self.engraving_color, self.has_background, self.collection_id, self.created_at, self.access_key, self.star_price)
+    
     def save(self):
-        with get_db_cursor() as cursor:
+        with write_cursor() as cursor:
             if self.id is None:
                 # Insert new card
-                cursor.execute("""
-                    INSERT INTO cards (card_number, name, owner_id, registration_date, expires, 
-                                     engraving_color, has_background, collection_id, created_at, access_key, star_price)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """, (self.card_number, self.name, self.owner_id, self.registration_date, 
-                      self.expires, self.engraving_color, self.has_background, self.collection_id, self.created_at, self.access_key, self.star_price))
+                cursor.execute(_SQL_INSERT_CARD, self._insert_params())
                 
                 self.id = cursor.lastrowid
             else:
@@ -410,39 +1111,83 @@ class Card:
                     WHERE id = ?
                 """, (self.name, self.owner_id, self.registration_date, self.expires,
                       self.engraving_color, self.has_background, self.collection_id, self.access_key, self.star_price, self.id))
-            return self
+        invalidate_api_cache("collections", "cards")
+        return self
+    
+    @classmethod
+    def save_many(cls, cards: list):
+        """Insert new cards in one transaction with a single executemany"""
+        if not cards:
+            return cards
+        with write_cursor() as cursor:
+            cursor.executemany(_SQL_INSERT_CARD, [card._insert_params() for card in cards])
+            # Rows of one statement get consecutive ids inside the write transaction
+            cursor.execute("SELECT last_insert_rowid()")
+            first_id = cursor.fetchone()[0] - len(cards) + 1
+        for i, card in enumerate(cards):
+            card.id = first_id + i
+        invalidate_api_cache("collections", "cards")
+        return cards
     
     @classmethod
     def from_row(cls, row):
-        access_key = row['access_key'] if 'access_key' in row.keys() else None
-        star_price = row['star_price'] if 'star_price' in row.keys() else 1
-        card = cls(row['card_number'], row['name'], row['owner_id'], row['expires'], 
-                  row['engraving_color'], bool(row['has_background']), row['collection_id'], 
-                  row['registration_date'], access_key, star_price)
+        # Fill the slots directly: __init__ would only format timestamps that get overwritten
+        card = cls.__new__(cls)
         card.id = row['id']
-        card.created_at = row['created_at']
+        card.card_number = row['card_number']
+        card.name = row['name']
+        card.owner_id = row['owner_id']
+        card.expires = row['expires']
+        card.engraving_color = row['engraving_color']
+        card.has_background = bool(row['has_background'])
+        card.collection_id = row['collection_id']
         card.registration_date = row['registration_date']
+        card.access_key = _row_get(row, 'access_key', None)
+        card.star_price = _row_get(row, 'star_price', 1)
+        card.created_at = row['created_at']
         return card
     
+    @classmethod
+    def from_tuple(cls, row):
+        """Build a card from a plain tuple in _CARD_TUPLE_COLUMNS order"""
+        card = cls.__new__(cls)
+        (card.id, card.card_number, card.name, card.owner_id, card.registration_date, card.expires,
+         card.engraving_color, has_background, card.collection_id, card.created_at,
+         card.access_key, card.star_price) = row
+        card.has_background = bool(has_background)
+        return card
+    
+    @classmethod
+    def get_by_ids(cls, card_ids) -> dict:
+        """Cards by id for a batch of ids in one query per _IN_BATCH_SIZE ids; missing ids are left out"""
+        with read_cursor() as cursor:
+            rows = _iter_by_ids(cursor, f"SELECT {_CARD_TUPLE_COLUMNS} FROM cards WHERE id IN", card_ids)
+            return {row[0]: cls.from_tuple(row) for row in rows}
+    
     @classmethod
     def get_by_id(cls, card_id: int):
-        with get_db_cursor() as cursor:
-            cursor.execute("SELECT * FROM cards WHERE id = ?", (card_id,))
-            row = cursor.fetchone()
-            return cls.from_row(row) if row else None
+        row = _card_row_by_id(card_id)
+        return cls.from_tuple(row) if row else None
     
     @classmethod
     def get_by_number(cls, card_number: int):
-        with get_db_cursor() as cursor:
-            cursor.execute("SELECT * FROM cards WHERE card_number = ?", (card_number,))
+        with read_cursor() as cursor:
+            cursor.execute(_SQL_CARD_BY_NUMBER, (card_number,))
             row = cursor.fetchone()
             return cls.from_row(row) if row else None
     
+    @classmethod
+    def get_by_collection_and_owner(cls, collection_id: int, owner_id: int):
+        """Получает карты коллекции, принадлежащие указанному владельцу"""
+        with read_cursor() as cursor:
+            rows = _iter_tuples(cursor, _SQL_CARDS_BY_COLLECTION_AND_OWNER, (collection_id, owner_id))
+            return list(map(cls.from_tuple, rows))
+    
     @classmethod
     def get_by_access_key(cls, access_key: str):
         """Получает карту по access key"""
-        with get_db_cursor() as cursor:
-            cursor.execute("SELECT * FROM cards WHERE access_key = ?", (access_key,))
+        with read_cursor() as cursor:
+            cursor.execute(_SQL_CARD_BY_ACCESS_KEY, (access_key,))
             row = cursor.fetchone()
             return cls.from_row(row) if row else None
     
@@ -456,10 +1201,13 @@ class Card:
     
     def delete(self):
         """Delete the card from database"""
-        with get_db_cursor() as cursor:
+        with write_cursor() as cursor:
             cursor.execute("DELETE FROM cards WHERE id = ?", (self.id,))
+        invalidate_api_cache("collections", "cards")
 
 class Collection:
+    __slots__ = ("id", "name", "description", "author_id", "star_price", "link_id", "is_published", "created_at")
+    
     def __init__(self, name: str, author_id: int, star_price: int = 1, description: str = None, link_id: str = None):
         self.name = name
         self.description = description or ""
@@ -472,112 +1220,87 @@ class Collection:
     
     def _generate_link_id(self):
         """Генерирует уникальный link_id для коллекции"""
-        return str(uuid.uuid4().hex)[:16]
+        # Same format as the v1.4.0 backfill: 8 random bytes as 16 hex chars
+        return os.urandom(8).hex()
     
     def save(self):
-        with get_db_cursor() as cursor:
-            # Check if description column exists, if not add it
-            cursor.execute("PRAGMA table_info(collections)")
-            columns = [col[1] for col in cursor.fetchall()]
-            if 'description' not in columns:
-                cursor.execute("ALTER TABLE collections ADD COLUMN description TEXT")
-            if 'is_published' not in columns:
-                cursor.execute("ALTER TABLE collections ADD COLUMN is_published BOOLEAN DEFAULT 0")
-            if 'link_id' not in columns:
-                cursor.execute("ALTER TABLE collections ADD COLUMN link_id TEXT")
-            
+        # description, is_published and link_id are guaranteed by the init_db migrations
+        with write_cursor() as cursor:
             cursor.execute("""
                 INSERT INTO collections (name, description, author_id, star_price, is_published, created_at, link_id)
                 VALUES (?, ?, ?, ?, ?, ?, ?)
             """, (self.name, self.description, self.author_id, self.star_price, self.is_published, self.created_at, self.link_id))
             
             self.id = cursor.lastrowid
-            return self
+        invalidate_api_cache("collections")
+        return self
     
     def update_price(self):
-        """Simple price update - set to 0 when collections are disabled"""
-        from config import ENABLE_COLLECTIONS
-        if not ENABLE_COLLECTIONS:
-            self.star_price = 0
-            with get_db_cursor() as cursor:
-                cursor.execute("UPDATE collections SET star_price = ? WHERE id = ?", (0, self.id))
-            return 0
-        
-        # Original complex logic for enabled collections
-        cards = self.get_cards()
-        total_price = 0
-        
-        if not cards:
+        """Recalculate star_price from the latest active sale price of each card (0 when collections are disabled)"""
+        import config
+        # ENABLE_COLLECTIONS is optional in config; collections are enabled unless it is set to False
+        if not getattr(config, "ENABLE_COLLECTIONS", True):
             self.star_price = 0
-            with get_db_cursor() as cursor:
+            with write_cursor() as cursor:
                 cursor.execute("UPDATE collections SET star_price = ? WHERE id = ?", (0, self.id))
+            invalidate_api_cache("collections")
             return 0
         
-        # Get active trade links for cards in this collection
-        with get_db_cursor() as cursor:
-            card_ids = [card.id for card in cards]
-            if card_ids:
-                placeholders = ','.join(['?'] * len(card_ids))
-                cursor.execute(f"""
-                    SELECT card_id, price FROM trade_links 
-                    WHERE card_id IN ({placeholders}) AND is_active = 1 AND is_gift = 0
-                    ORDER BY created_at DESC
-                """, card_ids)
-                
-                # Get latest price for each card
-                card_prices = {}
-                for row in cursor.fetchall():
-                    card_id = row[0]
-                    if card_id not in card_prices:
-                        card_prices[card_id] = row[1]
-                
-                total_price = sum(card_prices.values())
-        
-        self.star_price = total_price
-        
-        # Update in database
-        with get_db_cursor() as cursor:
-            cursor.execute("UPDATE collections SET star_price = ? WHERE id = ?", (total_price, self.id))
+        # Latest non-gift active trade link per card, summed and stored in one statement
+        with write_cursor() as cursor:
+            cursor.execute("""
+                WITH latest AS (
+                    SELECT price,
+                           ROW_NUMBER() OVER (PARTITION BY card_id ORDER BY created_at DESC) AS rn
+                    FROM trade_links
+                    WHERE card_id IN (SELECT id FROM cards WHERE collection_id = ?)
+                      AND is_active = 1 AND is_gift = 0
+                )
+                UPDATE collections
+                SET star_price = COALESCE((SELECT SUM(price) FROM latest WHERE rn = 1), 0)
+                WHERE id = ?
+            """, (self.id, self.id))
+            cursor.execute("SELECT star_price FROM collections WHERE id = ?", (self.id,))
+            row = cursor.fetchone()
         
-        return total_price
+        self.star_price = row[0] if row else 0
+        invalidate_api_cache("collections")
+        return self.star_price
     
     @classmethod
     def from_row(cls, row):
-        star_price = row['star_price'] if 'star_price' in row.keys() else 1
-        description = row['description'] if 'description' in row.keys() else ''
-        link_id = row['link_id'] if 'link_id' in row.keys() else None
-        collection = cls(row['name'], row['author_id'], star_price, description, link_id)
+        collection = cls.__new__(cls)
         collection.id = row['id']
-        collection.created_at = row['created_at']
+        collection.name = row['name']
+        collection.description = _row_get(row, 'description', '') or ""
+        collection.author_id = row['author_id']
+        collection.star_price = _row_get(row, 'star_price', 1)
+        collection.link_id = _row_get(row, 'link_id', None) or collection._generate_link_id()
         # Keep is_published for compatibility but don't use it
-        if 'is_published' in row.keys():
-            collection.is_published = row['is_published']
+        collection.is_published = _row_get(row, 'is_published', False)
+        collection.created_at = row['created_at']
         return collection
     
     @classmethod
     def get_by_id(cls, collection_id: int):
-        with get_db_cursor() as cursor:
-            cursor.execute("SELECT * FROM collections WHERE id = ?", (collection_id,))
+        with read_cursor() as cursor:
+            cursor.execute(_SQL_COLLECTION_BY_ID, (collection_id,))
             row = cursor.fetchone()
             return cls.from_row(row) if row else None
     
     @classmethod
     def get_by_access_key(cls, access_key: str):
         """Получает коллекцию по access key любой из её карт"""
-        with get_db_cursor() as cursor:
-            cursor.execute("""
-                SELECT DISTINCT c.* FROM collections c
-                JOIN cards ca ON c.id = ca.collection_id
-                WHERE ca.access_key = ?
-            """, (access_key,))
+        with read_cursor() as cursor:
+            cursor.execute(_SQL_COLLECTION_BY_CARD_ACCESS_KEY, (access_key,))
             row = cursor.fetchone()
             return cls.from_row(row) if row else None
     
     @classmethod
     def get_by_link_id(cls, link_id: str):
         """Получает коллекцию по постоянной ссылке"""
-        with get_db_cursor() as cursor:
-            cursor.execute("SELECT * FROM collections WHERE link_id = ?", (link_id,))
+        with read_cursor() as cursor:
+            cursor.execute(_SQL_COLLECTION_BY_LINK_ID, (link_id,))
             row = cursor.fetchone()
             return cls.from_row(row) if row else None
     
@@ -585,9 +1308,8 @@ class Collection:
         return User.get_by_id(self.author_id)
     
     def get_cards(self):
-        with get_db_cursor() as cursor:
-            cursor.execute("SELECT * FROM cards WHERE collection_id = ?", (self.id,))
-            return [Card.from_row(row) for row in cursor.fetchall()]
+        with read_cursor() as cursor:
+            return list(map(Card.from_tuple, _iter_tuples(cursor, _SQL_CARDS_BY_COLLECTION, (self.id,))))
     
 
 class TradeLink:
@@ -602,7 +1324,7 @@ class TradeLink:
         self.id = None
     
     def save(self):
-        with get_db_cursor() as cursor:
+        with write_cursor() as cursor:
             cursor.execute("""
                 INSERT INTO trade_links (link_id, card_id, seller_id, price, is_gift, created_at, is_active)
                 VALUES (?, ?, ?, ?, ?, ?, ?)
@@ -614,24 +1336,37 @@ class TradeLink:
     
     @classmethod
     def from_row(cls, row):
-        link = cls(row['link_id'], row['card_id'], row['seller_id'], row['price'], bool(row['is_gift']))
+        link = cls.__new__(cls)
         link.id = row['id']
+        link.link_id = row['link_id']
+        link.card_id = row['card_id']
+        link.seller_id = row['seller_id']
+        link.price = row['price']
+        link.is_gift = bool(row['is_gift'])
         link.created_at = row['created_at']
         link.is_active = bool(row['is_active'])
         return link
     
+    @classmethod
+    def from_tuple(cls, row):
+        """Build a trade link from a plain tuple in _SQL_ACTIVE_TRADE_LINKS column order"""
+        link = cls.__new__(cls)
+        link.id, link.link_id, link.card_id, link.seller_id, link.price, is_gift, link.created_at, is_active = row
+        link.is_gift = bool(is_gift)
+        link.is_active = bool(is_active)
+        return link
+    
     @classmethod
     def get_by_link_id(cls, link_id: str):
-        with get_db_cursor() as cursor:
-            cursor.execute("SELECT * FROM trade_links WHERE link_id = ?", (link_id,))
+        with read_cursor() as cursor:
+            cursor.execute(_SQL_TRADE_LINK_BY_LINK_ID, (link_id,))
             row = cursor.fetchone()
             return cls.from_row(row) if row else None
     
     @classmethod
     def get_active_links(cls):
-        with get_db_cursor() as cursor:
-            cursor.execute("SELECT * FROM trade_links WHERE is_active = 1")
-            return [cls.from_row(row) for row in cursor.fetchall()]
+        with read_cursor() as cursor:
+            return list(map(cls.from_tuple, _iter_tuples(cursor, _SQL_ACTIVE_TRADE_LINKS)))
     
     def get_card(self):
         return Card.get_by_id(self.card_id)
@@ -640,7 +1375,7 @@ class TradeLink:
         return User.get_by_id(self.seller_id)
     
     def deactivate(self):
-        with get_db_cursor() as cursor:
+        with write_cursor() as cursor:
             cursor.execute("UPDATE trade_links SET is_active = 0 WHERE id = ?", (self.id,))
             self.is_active = False
 
@@ -654,7 +1389,7 @@ class CollectionLink:
         self.id = None
     
     def save(self):
-        with get_db_cursor() as cursor:
+        with write_cursor() as cursor:
             cursor.execute("""
                 INSERT INTO collection_links (link_id, collection_id, seller_id, created_at, is_active)
                 VALUES (?, ?, ?, ?, ?)
@@ -665,24 +1400,27 @@ class CollectionLink:
     
     @classmethod
     def from_row(cls, row):
-        link = cls(row['link_id'], row['collection_id'], row['seller_id'])
+        link = cls.__new__(cls)
         link.id = row['id']
+        link.link_id = row['link_id']
+        link.collection_id = row['collection_id']
+        link.seller_id = row['seller_id']
         link.created_at = row['created_at']
         link.is_active = bool(row['is_active'])
         return link
     
     @classmethod
     def get_by_link_id(cls, link_id: str):
-        with get_db_cursor() as cursor:
-            cursor.execute("SELECT * FROM collection_links WHERE link_id = ?", (link_id,))
+        with read_cursor() as cursor:
+            cursor.execute(_SQL_COLLECTION_LINK_BY_LINK_ID, (link_id,))
             row = cursor.fetchone()
             return cls.from_row(row) if row else None
     
     @classmethod
     def get_active_links(cls):
-        with get_db_cursor() as cursor:
-            cursor.execute("SELECT * FROM collection_links WHERE is_active = 1")
-            return [cls.from_row(row) for row in cursor.fetchall()]
+        with read_cursor() as cursor:
+            cursor.execute(_SQL_ACTIVE_COLLECTION_LINKS)
+            return list(map(cls.from_row, cursor))
     
     def get_collection(self):
         return Collection.get_by_id(self.collection_id)
@@ -691,11 +1429,15 @@ class CollectionLink:
         return User.get_by_id(self.seller_id)
     
     def deactivate(self):
-        with get_db_cursor() as cursor:
+        with write_cursor() as cursor:
             cursor.execute("UPDATE collection_links SET is_active = 0 WHERE id = ?", (self.id,))
             self.is_active = False
 
 class Airdrop:
+    # cover_image (migration 1.7.0) is not loaded here but may be assigned by callers
+    __slots__ = ("id", "name", "description", "creator_id", "message_id", "chat_id", "is_active", "created_at",
+                 "cover_image", "_counts")
+    
     def __init__(self, name: str, creator_id: int, description: str = None):
         self.name = name
         self.description = description or ""
@@ -705,14 +1447,15 @@ class Airdrop:
         self.is_active = True
         self.created_at = datetime.utcnow().isoformat()
         self.id = None
+        self._counts = None
 
+    def _insert_params(self):
+        return (self.name, self.description, self.creator_id, self.message_id, self.chat_id, self.is_active, self.created_at)
+    
     def save(self):
-        with get_db_cursor() as cursor:
+        with write_cursor() as cursor:
             if self.id is None:
-                cursor.execute("""
-                    INSERT INTO airdrops (name, description, creator_id, message_id, chat_id, is_active, created_at)
-                    VALUES (?, ?, ?, ?, ?, ?, ?)
-                """, (self.name, self.description, self.creator_id, self.message_id, self.chat_id, self.is_active, self.created_at))
+                cursor.execute(_SQL_INSERT_AIRDROP, self._insert_params())
                 self.id = cursor.lastrowid
             else:
                 cursor.execute("""
@@ -720,66 +1463,136 @@ class Airdrop:
                     SET name = ?, description = ?, message_id = ?, chat_id = ?, is_active = ?
                     WHERE id = ?
                 """, (self.name, self.description, self.message_id, self.chat_id, self.is_active, self.id))
-            return self
+        invalidate_local("airdrops")
+        return self
+    
+    @classmethod
+    def save_many(cls, airdrops: list):
+        """Insert new airdrops in one transaction with a single executemany"""
+        if not airdrops:
+            return airdrops
+        with write_cursor() as cursor:
+            cursor.executemany(_SQL_INSERT_AIRDROP, [airdrop._insert_params() for airdrop in airdrops])
+            # Rows of one statement get consecutive ids inside the write transaction
+            cursor.execute("SELECT last_insert_rowid()")
+            first_id = cursor.fetchone()[0] - len(airdrops) + 1
+        for i, airdrop in enumerate(airdrops):
+            airdrop.id = first_id + i
+        invalidate_local("airdrops")
+        return airdrops
     
     @classmethod
     def from_row(cls, row):
-        airdrop = cls(row['name'], row['creator_id'], row['description'])
+        airdrop = cls.__new__(cls)
         airdrop.id = row['id']
+        airdrop.name = row['name']
+        airdrop.description = row['description'] or ""
+        airdrop.creator_id = row['creator_id']
         airdrop.message_id = row['message_id']
         airdrop.chat_id = row['chat_id']
         airdrop.is_active = bool(row['is_active'])
         airdrop.created_at = row['created_at']
+        airdrop._counts = None
+        return airdrop
+    
+    @classmethod
+    def from_tuple(cls, row):
+        """Build an airdrop from a plain tuple in _AIRDROP_TUPLE_COLUMNS order"""
+        airdrop = cls.__new__(cls)
+        (airdrop.id, airdrop.name, description, airdrop.creator_id, airdrop.message_id,
+         airdrop.chat_id, is_active, airdrop.created_at, total_cards, available_cards) = row
+        airdrop.description = description or ""
+        airdrop.is_active = bool(is_active)
+        airdrop._counts = (total_cards, available_cards)
         return airdrop
     
     @classmethod
     def get_by_id(cls, airdrop_id: int):
-        with get_db_cursor() as cursor:
-            cursor.execute("SELECT * FROM airdrops WHERE id = ?", (airdrop_id,))
-            row = cursor.fetchone()
-            return cls.from_row(row) if row else None
+        with read_cursor() as cursor:
+            rows = _fetch_tuples(cursor, _SQL_AIRDROP_BY_ID, (airdrop_id,))
+            return cls.from_tuple(rows[0]) if rows else None
     
+    # The active list is memoized per process for a few seconds and dropped on every
+    # airdrop write here; the returned airdrops are shared, so treat them as read-only
     @classmethod
+    @memoize(ttl=5, namespace="airdrops")
     def get_active_airdrops(cls):
-        with get_db_cursor() as cursor:
-            cursor.execute("SELECT * FROM airdrops WHERE is_active = 1 ORDER BY created_at DESC")
-            return [cls.from_row(row) for row in cursor.fetchall()]
+        with read_cursor() as cursor:
+            return list(map(cls.from_tuple, _iter_tuples(cursor, _SQL_ACTIVE_AIRDROPS)))
+    
+    @classmethod
+    @memoize(ttl=5, namespace="airdrops")
+    def get_active_airdrops_with_stats(cls):
+        """Active airdrops paired with their creators (None if missing) in one query.
+
+        Card counts come from the airdrop's counter columns and are already loaded,
+        so get_card_counts() on the returned airdrops does not query again.
+        """
+        with read_cursor() as cursor:
+            width = _AIRDROP_TUPLE_WIDTH
+            return [(cls.from_tuple(row[:width]),
+                     User.from_tuple(row[width:]) if row[width] is not None else None)
+                    for row in _iter_tuples(cursor, _SQL_ACTIVE_AIRDROPS_WITH_CREATORS)]
     
     def get_creator(self):
         return User.get_by_id(self.creator_id)
     
     def get_cards(self):
-        with get_db_cursor() as cursor:
-            cursor.execute("""
-                SELECT c.* FROM cards c
-                JOIN airdrop_cards ac ON c.id = ac.card_id
-                WHERE ac.airdrop_id = ? AND ac.is_reserved = 0
-            """, (self.id,))
-            return [Card.from_row(row) for row in cursor.fetchall()]
+        with read_cursor() as cursor:
+            return list(map(Card.from_tuple, _iter_tuples(cursor, _SQL_AVAILABLE_AIRDROP_CARDS, (self.id,))))
+    
+    def get_cards_with_owners(self):
+        """Available cards paired with their owners (None if not registered) in one query"""
+        with read_cursor() as cursor:
+            width = _CARD_TUPLE_WIDTH
+            return [(Card.from_tuple(row[:width]),
+                     User.from_tuple(row[width:]) if row[width] is not None else None)
+                    for row in _iter_tuples(cursor, _SQL_AVAILABLE_AIRDROP_CARDS_WITH_OWNERS, (self.id,))]
+    
+    def get_card_counts(self):
+        """(total, available) card counts from the airdrop's counters, kept until add_card/deactivate"""
+        if self._counts is None:
+            with read_cursor() as cursor:
+                cursor.execute(_SQL_AIRDROP_CARD_COUNTS, (self.id,))
+                row = cursor.fetchone()
+            self._counts = tuple(row) if row else (0, 0)
+        return self._counts
     
     def get_total_cards(self):
-        with get_db_cursor() as cursor:
-            cursor.execute("SELECT COUNT(*) FROM airdrop_cards WHERE airdrop_id = ?", (self.id,))
-            return cursor.fetchone()[0]
+        return self.get_card_counts()[0]
     
     def get_available_cards(self):
-        with get_db_cursor() as cursor:
-            cursor.execute("SELECT COUNT(*) FROM airdrop_cards WHERE airdrop_id = ? AND is_reserved = 0", (self.id,))
-            return cursor.fetchone()[0]
+        return self.get_card_counts()[1]
+    
+    def get_card_ids(self) -> set:
+        """IDs of all cards in this airdrop as a set for O(1) membership checks"""
+        with read_cursor() as cursor:
+            cursor.execute("SELECT card_id FROM airdrop_cards WHERE airdrop_id = ?", (self.id,))
+            return {row[0] for row in cursor.fetchall()}
     
     def add_card(self, card_id: int):
-        with get_db_cursor() as cursor:
-            cursor.execute("""
+        self.add_cards([card_id])
+    
+    def add_cards(self, card_ids):
+        """Add many cards in one transaction; use this instead of add_card in a loop when seeding"""
+        with write_cursor() as cursor:
+            # DML opens the transaction implicitly and write_cursor commits it once at the end
+            cursor.executemany("""
                 INSERT OR IGNORE INTO airdrop_cards (airdrop_id, card_id)
                 VALUES (?, ?)
-            """, (self.id, card_id))
+            """, ((self.id, card_id) for card_id in card_ids))
+        self._counts = None
+        invalidate_local("airdrops")
     
     def deactivate(self):
         self.is_active = False
+        self._counts = None
         self.save()
 
 
 class AirdropCard:
+    __slots__ = ("id", "airdrop_id", "card_id", "is_reserved", "reserved_by", "reserved_at")
+    
     def __init__(self, airdrop_id: int, card_id: int):
         self.airdrop_id = airdrop_id
         self.card_id = card_id
@@ -789,58 +1602,96 @@ class AirdropCard:
         self.id = None
     
     def save(self):
-        with get_db_cursor() as cursor:
+        with write_cursor() as cursor:
             if self.id is None:
-                cursor.execute("""
-                    INSERT INTO airdrop_cards (airdrop_id, card_id, is_reserved, reserved_by, reserved_at)
-                    VALUES (?, ?, ?, ?, ?)
-                """, (self.airdrop_id, self.card_id, self.is_reserved, self.reserved_by, self.reserved_at))
+                cursor.execute(_SQL_INSERT_AIRDROP_CARD,
+                               (self.airdrop_id, self.card_id, self.is_reserved, self.reserved_by, self.reserved_at))
                 self.id = cursor.lastrowid
             else:
-                cursor.execute("""
-                    UPDATE airdrop_cards 
-                    SET is_reserved = ?, reserved_by = ?, reserved_at = ?
-                    WHERE id = ?
-                """, (self.is_reserved, self.reserved_by, self.reserved_at, self.id))
-            return self
+                cursor.execute(_SQL_UPDATE_AIRDROP_CARD,
+                               (self.is_reserved, self.reserved_by, self.reserved_at, self.id))
+        # Card counters on airdrops change with every airdrop_cards write
+        invalidate_local("airdrops")
+        return self
     
     @classmethod
     def from_row(cls, row):
-        airdrop_card = cls(row['airdrop_id'], row['card_id'])
+        airdrop_card = cls.__new__(cls)
         airdrop_card.id = row['id']
+        airdrop_card.airdrop_id = row['airdrop_id']
+        airdrop_card.card_id = row['card_id']
         airdrop_card.is_reserved = bool(row['is_reserved'])
         airdrop_card.reserved_by = row['reserved_by']
         airdrop_card.reserved_at = row['reserved_at']
         return airdrop_card
     
+    @classmethod
+    def from_tuple(cls, row):
+        """Build an airdrop card from a plain tuple in _AIRDROP_CARD_TUPLE_COLUMNS order"""
+        airdrop_card = cls.__new__(cls)
+        (airdrop_card.id, airdrop_card.airdrop_id, airdrop_card.card_id, is_reserved,
+         airdrop_card.reserved_by, airdrop_card.reserved_at) = row
+        airdrop_card.is_reserved = bool(is_reserved)
+        return airdrop_card
+    
     @classmethod
     def get_random_available_card(cls, airdrop_id: int):
-        with get_db_cursor() as cursor:
-            cursor.execute("""
-                SELECT ac.* FROM airdrop_cards ac
-                WHERE ac.airdrop_id = ? AND ac.is_reserved = 0
-                ORDER BY RANDOM() LIMIT 1
-            """, (airdrop_id,))
+        with read_cursor() as cursor:
+            # Skip a random number of available rows instead of sorting them all by RANDOM();
+            # the counter read and the pick run as one statement, so both see the same snapshot
+            rows = _fetch_tuples(cursor, _SQL_RANDOM_AVAILABLE_AIRDROP_CARD, (airdrop_id, airdrop_id))
+            return cls.from_tuple(rows[0]) if rows else None
+    
+    @classmethod
+    def claim(cls, airdrop_id: int, user_id: int):
+        """Reserve a random available card of the airdrop for user_id and hand it over.
+
+        The pick and the reservation are one UPDATE, so two concurrent claims can never
+        get the same card. Returns the transferred Card, or None when nothing is left.
+        Raises sqlite3.IntegrityError when the picked airdrop card points at a deleted
+        card; the reservation and the available_cards decrement are rolled back with it.
+        """
+        with write_cursor() as cursor:
+            # The first statement writes, so the transaction takes the write lock right away
+            cursor.execute(_SQL_CLAIM_AIRDROP_CARD, (user_id, airdrop_id, airdrop_id))
+            reserved = cursor.fetchone()
+            if reserved is None:
+                return None
+            cursor.execute(_SQL_TRANSFER_CARD, (user_id, reserved[0]))
             row = cursor.fetchone()
-            return cls.from_row(row) if row else None
+            if row is None:
+                # Raising inside write_cursor rolls back the reservation made above
+                raise sqlite3.IntegrityError(f"Airdrop {airdrop_id} references missing card {reserved[0]}")
+        invalidate_api_cache("collections", "cards")
+        invalidate_local("airdrops")
+        return Card.from_row(row)
     
     def reserve_card(self, user_id: int):
-        self.is_reserved = True
-        self.reserved_by = user_id
-        self.reserved_at = datetime.utcnow().isoformat()
-        
-        # Transfer card ownership
-        card = Card.get_by_id(self.card_id)
-        if card:
-            card.owner_id = user_id
-            card.save()
-        
-        self.save()
-        return card
+        with write_cursor() as cursor:
+            if self.id is None:
+                self.save()
+            # The reservation timestamp is set by SQLite and read back with RETURNING
+            cursor.execute(_SQL_RESERVE_AIRDROP_CARD, (user_id, self.id))
+            reserved = cursor.fetchone()
+            self.is_reserved = True
+            self.reserved_by = user_id
+            self.reserved_at = reserved[0] if reserved else None
+            # Transfer card ownership in SQL; RETURNING hands back the updated card
+            cursor.execute(_SQL_TRANSFER_CARD, (user_id, self.card_id))
+            row = cursor.fetchone()
+        invalidate_api_cache("collections", "cards")
+        invalidate_local("airdrops")
+        return Card.from_row(row) if row else None
     
     def get_card(self):
         return Card.get_by_id(self.card_id)
     
+    @staticmethod
+    def load_cards(airdrop_cards):
+        """Pair airdrop cards with their Card (None if deleted) using batched lookups instead of get_card() per row"""
+        cards = Card.get_by_ids(ac.card_id for ac in airdrop_cards)
+        return [(ac, cards.get(ac.card_id)) for ac in airdrop_cards]
+    
     def get_reserved_user(self):
         if self.reserved_by:
             return User.get_by_id(self.reserved_by)
@@ -0,0 +1,61 @@
+# Конфигурация gunicorn для продакшн-запуска API:
+#   cd src && gunicorn api_server:app
+import multiprocessing
+import os
+import subprocess
+import sys
+import threading
+import time
+
+# Каталог src/: и этот файл, и подпроцессы находят config и database, даже если gunicorn запущен не из src
+_SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+if _SRC_DIR not in sys.path:
+    sys.path.insert(0, _SRC_DIR)
+
+from config import FLASK_HOST, FLASK_PORT, CLEANUP_INTERVAL, OPTIMIZE_INTERVAL
+
+bind = f"{FLASK_HOST}:{FLASK_PORT}"
+
+# Все эндпоинты упираются в I/O, поэтому используем gevent-воркеры:
+# gunicorn сам выполняет monkey.patch_all() в каждом воркере
+worker_class = "gevent"
+workers = int(os.getenv("GUNICORN_WORKERS", multiprocessing.cpu_count() * 2 + 1))
+worker_connections = int(os.getenv("GUNICORN_WORKER_CONNECTIONS", 1000))
+
+def _run_in_subprocess(code):
+    """Выполняет код в отдельном интерпретаторе, не импортируя database в мастер"""
+    # Рабочий каталог не меняем: относительные DATABASE_URL и cards/ должны
+    # указывать туда же, куда и у воркеров
+    pythonpath = os.pathsep.join(filter(None, [_SRC_DIR, os.environ.get("PYTHONPATH")]))
+    subprocess.run([sys.executable, "-c", code], check=True, env={**os.environ, "PYTHONPATH": pythonpath})
+
+def on_starting(server):
+    """Применяем миграции один раз до запуска воркеров"""
+    # Отдельным процессом: воркеры форкаются от мастера и патчат gevent уже после форка,
+    # так что импортированный в мастере database унёс бы в них обычные threading.local,
+    # блокировки и очередь пула вместо greenlet-aware версий
+    _run_in_subprocess("from database import init_db; init_db()")
+
+def _periodic_loop(server, label, code, interval, delay=0):
+    """Раз в interval секунд выполняет code отдельным процессом (первый раз через delay секунд)"""
+    time.sleep(delay)
+    while True:
+        try:
+            _run_in_subprocess(code)
+        except (OSError, subprocess.CalledProcessError) as e:
+            server.log.warning(f"{label} failed: {e}")
+        time.sleep(interval)
+
+def _start_periodic(server, *args, **kwargs):
+    threading.Thread(target=_periodic_loop, args=(server, *args), kwargs=kwargs, daemon=True).start()
+
+def when_ready(server):
+    """Фоновые задачи общие для всех воркеров, поэтому их запускает мастер, а не каждый воркер"""
+    _start_periodic(server, "Temp file cleanup",
+                    "from database import cleanup_old_temp_files; cleanup_old_temp_files()",
+                    CLEANUP_INTERVAL)
+    # Статистику планировщика SQLite обновляет один процесс, а не 2*CPU+1 воркеров разом;
+    # сразу после init_db в on_starting это не нужно, поэтому первый запуск через интервал
+    _start_periodic(server, "PRAGMA optimize",
+                    "from database import optimize_db; optimize_db()",
+                    OPTIMIZE_INTERVAL, delay=OPTIMIZE_INTERVAL)